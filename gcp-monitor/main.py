@@ -11,6 +11,7 @@ import os
 import socket
 import ssl
 import sys
+import time
 from datetime import datetime, timezone
 from typing import Any
 
@@ -44,6 +45,9 @@ THRESHOLD_UPLOAD_MBPS = float(os.environ.get("THRESHOLD_UPLOAD_MBPS", "5"))
 THRESHOLD_SPEEDTEST_STALE_HOURS = float(os.environ.get("THRESHOLD_SPEEDTEST_STALE_HOURS", "2"))
 THRESHOLD_CERT_EXPIRY_DAYS = int(os.environ.get("THRESHOLD_CERT_EXPIRY_DAYS", "14"))
 
+# Only the health API sections read below - lets health-api skip storage/SMART for us
+HEALTH_API_SECTIONS = "cpu_percent,memory,disk,speed_test,plex"
+
 # Endpoints to check (home server services only)
 PUBLIC_ENDPOINTS = [
     ("camerontora.ca", "https://camerontora.ca"),
@@ -56,6 +60,12 @@ _alert_state: dict[str, bool] = {}
 _vpn_unhealthy_count: dict[str, int] = {}  # location -> consecutive unhealthy count
 FAILOVER_THRESHOLD = 6  # 6 checks at 5 min intervals = ~30 minutes
 
+# health-api runs the switch as a background job. /check submits it and returns
+# (Cloud Scheduler gives an attempt 60s); later checks look the job up until it
+# finishes, giving up VPN_SWITCH_TIMEOUT seconds after it was submitted.
+VPN_SWITCH_TIMEOUT = 900
+_pending_vpn_switch: dict[str, Any] | None = None  # job_id, from, to, submitted_at
+
 
 def send_discord_alert(title: str, message: str, severity: str = "major"):
     """Send alert to Discord webhook.
@@ -180,7 +190,12 @@ def check_health_api() -> dict[str, Any]:
 
     try:
         headers = {"X-API-Key": HEALTH_API_KEY} if HEALTH_API_KEY else {}
-        resp = requests.get(HEALTH_API_URL, headers=headers, timeout=30)
+        resp = requests.get(
+            HEALTH_API_URL,
+            headers=headers,
+            params={"sections": HEALTH_API_SECTIONS},
+            timeout=30,
+        )
         resp.raise_for_status()
         health_data = resp.json()
 
@@ -296,10 +311,72 @@ def check_vpn_health(health_data: dict[str, Any]) -> dict[str, Any]:
     return results
 
 
+def get_vpn_switch_job(job_id: str) -> dict[str, Any] | None:
+    """Look up a health-api VPN switch job; None if it no longer exists."""
+    job_url = HEALTH_API_URL.replace("/api/health", f"/api/health/vpn/jobs/{job_id}")
+    resp = requests.get(job_url, headers={"X-API-Key": HEALTH_API_KEY}, timeout=15)
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+
+def confirm_vpn_switch() -> dict[str, Any]:
+    """Check on the failover switch submitted by an earlier /check.
+
+    Sends the completed/failed alert once the job finishes. While it is still
+    running the result has "failover": "pending".
+    """
+    global _pending_vpn_switch
+    pending = _pending_vpn_switch
+    summary = {"from": pending["from"], "to": pending["to"], "job_id": pending["job_id"]}
+
+    try:
+        job = get_vpn_switch_job(pending["job_id"])
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"VPN switch job {pending['job_id']} lookup failed: {e}")
+        job = {"status": "unknown"}
+
+    if job is None:
+        error = "Switch job no longer exists on health-api (restarted?)"
+    elif job["status"] == "failed":
+        error = (job.get("result") or {}).get("error", "VPN switch failed")
+    elif job["status"] != "succeeded":
+        if time.time() - pending["submitted_at"] < VPN_SWITCH_TIMEOUT:
+            return {"failover": "pending", **summary, "status": job["status"]}
+        error = f"Switch did not finish within {VPN_SWITCH_TIMEOUT}s"
+    else:
+        error = None
+
+    _pending_vpn_switch = None
+    if error:
+        send_discord_alert("VPN Failover Failed",
+            f"Failed to switch from **{pending['from'].title()}** to **{pending['to'].title()}**\n"
+            f"Error: {error}",
+            severity="minor")
+        logger.error(f"VPN failover failed: {error}")
+        return {"failover": False, **summary, "error": error}
+
+    send_discord_alert("VPN Failover Complete",
+        f"Successfully switched from **{pending['from'].title()}** to **{pending['to'].title()}**\n"
+        f"Transmission now routing through {pending['to'].title()} VPN.",
+        severity="recovery")
+
+    # Reset unhealthy count
+    _vpn_unhealthy_count[pending["from"]] = 0
+
+    logger.info(f"VPN failover completed: {pending['from']} -> {pending['to']}")
+    return {"failover": True, **summary, "result": job["result"]}
+
+
 def check_vpn_and_failover(health_data: dict[str, Any]) -> dict[str, Any]:
     """Check VPN health and trigger failover if needed."""
     global _vpn_unhealthy_count
 
+    # A failover from an earlier check is still switching - don't start another
+    if _pending_vpn_switch:
+        return confirm_vpn_switch()
+
     speed_test = health_data.get("speed_test", {})
     vpn_data = speed_test.get("vpn", {})
 
@@ -341,8 +418,8 @@ def check_vpn_and_failover(health_data: dict[str, Any]) -> dict[str, Any]:
 
 
 def trigger_failover(failed_location: str, vpn_data: dict[str, Any]) -> dict[str, Any]:
-    """Trigger failover to best healthy VPN."""
-    global _vpn_unhealthy_count
+    """Submit a switch to the best healthy VPN; the next check confirms it."""
+    global _pending_vpn_switch
 
     # Find healthy VPNs sorted by download speed
     healthy_vpns = []
@@ -378,22 +455,18 @@ def trigger_failover(failed_location: str, vpn_data: dict[str, Any]) -> dict[str
             switch_url,
             headers={"X-API-Key": HEALTH_API_KEY},
             json={"location": target, "reason": f"auto-failover from {failed_location}"},
-            timeout=90
+            timeout=30
         )
         resp.raise_for_status()
-        result = resp.json()
-
-        # Send "completed" alert
-        send_discord_alert("VPN Failover Complete",
-            f"Successfully switched from **{failed_location.title()}** to **{target.title()}**\n"
-            f"Transmission now routing through {target.title()} VPN.",
-            severity="recovery")
-
-        # Reset unhealthy count
-        _vpn_unhealthy_count[failed_location] = 0
-
-        logger.info(f"VPN failover completed: {failed_location} -> {target}")
-        return {"failover": True, "from": failed_location, "to": target, "result": result}
+        job_id = resp.json()["job_id"]
+        _pending_vpn_switch = {
+            "job_id": job_id,
+            "from": failed_location,
+            "to": target,
+            "submitted_at": time.time(),
+        }
+        logger.info(f"VPN failover submitted: {failed_location} -> {target} (job {job_id})")
+        return {"failover": "pending", "from": failed_location, "to": target, "job_id": job_id}
 
     except Exception as e:
         # Send "failed" alert
@@ -497,7 +570,7 @@ def run_health_check() -> dict[str, Any]:
         # Check for auto-failover (only if health API is reachable)
         failover_result = check_vpn_and_failover(health.get("data", {}))
         results["vpn_failover"] = failover_result
-        if failover_result.get("failover"):
+        if failover_result.get("failover") is True:
             results["alerts"].append(f"VPN failover: {failover_result.get('from')} -> {failover_result.get('to')}")
 
     # Direct Plex check
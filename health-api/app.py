@@ -5,20 +5,38 @@ Exposes system metrics, Plex status, and speed test results.
 Also provides admin endpoints for VPN management (OAuth protected via nginx).
 """
 
+import fcntl
+import gzip
+import hashlib
+import io
 import json
+import math
+import mmap
 import os
+import queue
 import re
+import sqlite3
+import struct
 import subprocess
+import tarfile
 import threading
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from functools import wraps
+from http.cookiejar import DefaultCookiePolicy
 from pathlib import Path
+from typing import NamedTuple
 
 import docker
 import psutil
 import requests
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 
 app = Flask(__name__)
 
@@ -86,6 +104,343 @@ MONITORED_DISKS = [
 ]
 
 
+# ============== HTTP SESSION ==============
+# All outbound HTTP goes through one keep-alive session with a connection pool
+# per host:port (the ~16 local service ports, Plex, Sonarr/Radarr, IP lookups).
+
+HTTP_POOL_CONNECTIONS = 32  # host:port pools kept; above this the least recently used is dropped
+HTTP_POOL_MAXSIZE = 4       # idle keep-alive connections kept per host:port
+
+# Sockets actually opened per "scheme://host:port" (urllib3 silently reconnects
+# a pooled connection the server closed, so its own counters overstate reuse)
+_http_connects = {}
+_http_connects_lock = threading.Lock()
+
+
+def _count_http_connect(scheme: str, host: str, port: int):
+    with _http_connects_lock:
+        key = f"{scheme}://{host}:{port}"
+        _http_connects[key] = _http_connects.get(key, 0) + 1
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        _count_http_connect("http", self.host, self.port)
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _count_http_connect("https", self.host, self.port)
+        super().connect()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools count every socket they open."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+def _make_http_session() -> requests.Session:
+    session = requests.Session()
+    adapter = PooledHTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Probes must stay stateless - never replay cookies a service sets
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+http_session = _make_http_session()
+
+
+def get_http_pool_stats() -> dict:
+    """Per host:port request and new-connection counts for the shared HTTP session."""
+    with _http_connects_lock:
+        connects = dict(_http_connects)
+
+    pools = {}
+    manager = http_session.get_adapter("http://").poolmanager
+    for key in manager.pools.keys():
+        pool = manager.pools.get(key)
+        if pool is None:
+            continue
+        name = f"{pool.scheme}://{pool.host}:{pool.port}"
+        new_connections = connects.get(name, 0)
+        pools[name] = {
+            "requests": pool.num_requests,
+            "new_connections": new_connections,
+            "reused": max(pool.num_requests - new_connections, 0),
+            # The pool queue is pre-filled with None placeholders for unopened slots
+            "idle": sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0,
+        }
+
+    totals = {
+        field: sum(pool[field] for pool in pools.values())
+        for field in ("requests", "new_connections", "reused")
+    }
+    return {"totals": totals, "pools": pools}
+
+
+# ============== SHARED CACHE ==============
+# Collector results shared by both gunicorn workers, so one worker's refresh
+# serves the other. SQLite in WAL mode lets readers in either worker proceed
+# while the other commits.
+
+SHARED_CACHE_FILE = os.environ.get("SHARED_CACHE_FILE", "/tmp/health-api/cache.db")
+
+
+class CacheEntry(NamedTuple):
+    value: object
+    stored_at: float  # unix time
+    fresh: bool
+
+
+class SharedCache:
+    """JSON values with per-entry TTLs in a SQLite file shared across workers.
+
+    get() returns fresh entries only, unless allow_stale=True. Expired entries
+    are kept, so a collector whose refresh fails can still serve its last good
+    value. Hits, misses and stale reads are counted per key in the same file.
+    Cache errors are logged and treated as misses - health checks never fail
+    because of the cache.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()  # one connection per thread
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, ttl REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "key TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0,"
+                " misses INTEGER NOT NULL DEFAULT 0, stale INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _count(self, key: str, outcome: str):
+        self._conn().execute(
+            f"INSERT INTO counters (key, {outcome}) VALUES (?, 1) "
+            f"ON CONFLICT(key) DO UPDATE SET {outcome} = {outcome} + 1",
+            (key,),
+        )
+
+    def peek(self, key: str) -> CacheEntry | None:
+        """The stored entry, fresh or not, without touching the counters."""
+        try:
+            row = self._conn().execute(
+                "SELECT value, stored_at, ttl FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except (OSError, sqlite3.Error) as e:
+            app.logger.warning(f"Shared cache read failed for {key}: {e}")
+            return None
+        if row is None:
+            return None
+        value, stored_at, ttl = row
+        return CacheEntry(json.loads(value), stored_at, time.time() - stored_at < ttl)
+
+    def get(self, key: str, max_age: float | None = None, allow_stale: bool = False) -> CacheEntry | None:
+        """Return the entry if it is within its TTL (or `max_age`, if given).
+
+        allow_stale: also return an expired entry (counted as "stale").
+        """
+        entry = self.peek(key)
+        if entry is not None and max_age is not None:
+            entry = entry._replace(fresh=time.time() - entry.stored_at <= max_age)
+        if entry is not None and entry.fresh:
+            outcome = "hits"
+        elif entry is not None and allow_stale:
+            outcome = "stale"
+        else:
+            outcome, entry = "misses", None
+        try:
+            self._count(key, outcome)
+        except (OSError, sqlite3.Error) as e:
+            app.logger.warning(f"Shared cache counter update failed for {key}: {e}")
+        return entry
+
+    def set(self, key: str, value, ttl: float):
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO entries (key, value, stored_at, ttl) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), time.time(), ttl),
+            )
+        except (OSError, sqlite3.Error, TypeError, ValueError) as e:
+            app.logger.warning(f"Shared cache write failed for {key}: {e}")
+
+    def stats(self) -> dict:
+        """Per-key TTL, age and hit/miss counters, for tuning TTLs."""
+        try:
+            conn = self._conn()
+            entries = {
+                key: (stored_at, ttl)
+                for key, stored_at, ttl in conn.execute("SELECT key, stored_at, ttl FROM entries")
+            }
+            counters = {
+                key: (hits, misses, stale)
+                for key, hits, misses, stale in conn.execute("SELECT key, hits, misses, stale FROM counters")
+            }
+        except (OSError, sqlite3.Error) as e:
+            return {"error": str(e)}
+
+        now = time.time()
+        keys = {}
+        for key in sorted(entries.keys() | counters.keys()):
+            hits, misses, stale = counters.get(key, (0, 0, 0))
+            lookups = hits + misses + stale
+            stored_at, ttl = entries.get(key, (None, None))
+            keys[key] = {
+                "hits": hits,
+                "misses": misses,
+                "stale": stale,
+                "hit_ratio": round(hits / lookups, 3) if lookups else None,
+                "ttl": ttl,
+                "age": round(now - stored_at, 1) if stored_at is not None else None,
+            }
+        return {"file": self._path, "keys": keys}
+
+
+shared_cache = SharedCache(SHARED_CACHE_FILE)
+
+
+# ============== TIMINGS ==============
+# Monotonic durations of collectors, the external calls inside them and
+# routes, kept per worker in rolling windows for /api/health/debug/timings.
+
+TIMING_WINDOW = 1000  # most recent durations kept per key
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "5000"))
+
+
+def _percentile(ordered: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+class LatencyTracker:
+    """Rolling window of the last TIMING_WINDOW durations per (kind, name)."""
+
+    def __init__(self, window: int):
+        self._window = window
+        self._lock = threading.Lock()
+        self._durations = {}  # (kind, name) -> deque of ms
+        self._counts = {}  # (kind, name) -> total recorded, including evicted ones
+
+    def record(self, kind: str, name: str, ms: float):
+        key = (kind, name)
+        with self._lock:
+            if key not in self._durations:
+                self._durations[key] = deque(maxlen=self._window)
+                self._counts[key] = 0
+            self._durations[key].append(ms)
+            self._counts[key] += 1
+
+    def last(self, kind: str, name: str) -> float | None:
+        with self._lock:
+            durations = self._durations.get((kind, name))
+            return durations[-1] if durations else None
+
+    def stats(self) -> dict:
+        """{kind: {name: {count, last_ms, p50_ms, p95_ms, p99_ms, max_ms}}}"""
+        with self._lock:
+            snapshot = {key: (list(durations), self._counts[key]) for key, durations in self._durations.items()}
+
+        result = {}
+        for (kind, name), (durations, count) in sorted(snapshot.items()):
+            ordered = sorted(durations)
+            result.setdefault(kind, {})[name] = {
+                "count": count,
+                "last_ms": round(durations[-1], 2),
+                "p50_ms": round(_percentile(ordered, 50), 2),
+                "p95_ms": round(_percentile(ordered, 95), 2),
+                "p99_ms": round(_percentile(ordered, 99), 2),
+                "max_ms": round(ordered[-1], 2),
+            }
+        return result
+
+
+latency = LatencyTracker(TIMING_WINDOW)
+
+
+@contextmanager
+def timed(kind: str, name: str):
+    """Record how long the block takes under (kind, name), even if it raises."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        latency.record(kind, name, (time.monotonic() - started) * 1000)
+
+
+def timed_collector(name: str, collector):
+    """Wrap a section collector so each real run is recorded as ("collectors", name)."""
+    def run():
+        with timed("collectors", name):
+            return collector()
+    return run
+
+
+def add_server_timing(name: str, ms: float | None, desc: str | None = None):
+    """Add a metric to this request's Server-Timing header."""
+    if ms is not None and "server_timing" in g:
+        g.server_timing.append((name, ms, desc))
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.monotonic()
+    g.server_timing = []
+
+
+@app.after_request
+def record_request_timing(response):
+    """Emit Server-Timing, record the route's duration and log slow requests."""
+    if "request_started" not in g:
+        return response
+    total_ms = (time.monotonic() - g.request_started) * 1000
+    route = f"{request.method} {request.url_rule.rule if request.url_rule else '<unmatched>'}"
+    latency.record("routes", route, total_ms)
+
+    metrics = g.server_timing + [("total", total_ms, None)]
+    response.headers["Server-Timing"] = ", ".join(
+        f'{name};dur={ms:.1f}' + (f';desc="{desc}"' if desc else "") for name, ms, desc in metrics
+    )
+    if total_ms > SLOW_REQUEST_MS:
+        app.logger.warning(json.dumps({
+            "event": "slow_request",
+            "route": route,
+            "path": request.full_path.rstrip("?"),
+            "status": response.status_code,
+            "duration_ms": round(total_ms, 1),
+            "budget_ms": SLOW_REQUEST_MS,
+            "timings": {name: round(ms, 1) for name, ms, _ in g.server_timing},
+        }))
+    return response
+
+
 def require_api_key(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -137,7 +492,8 @@ def get_disk_info():
 def get_plex_sessions():
     """Return active stream counts from /status/sessions."""
     headers = {"X-Plex-Token": PLEX_TOKEN, "Accept": "application/json"}
-    resp = requests.get(f"{PLEX_URL}/status/sessions", headers=headers, timeout=10)
+    with timed("calls", "plex_sessions"):
+        resp = http_session.get(f"{PLEX_URL}/status/sessions", headers=headers, timeout=PLEX_TIMEOUT)
     resp.raise_for_status()
 
     counts = {"total": 0, "direct_play": 0, "direct_stream": 0, "transcode_hw": 0, "transcode_sw": 0}
@@ -157,65 +513,142 @@ def get_plex_sessions():
     return counts
 
 
-def get_plex_status():
-    """Check Plex server status and library info."""
-    if not PLEX_TOKEN:
-        return {"reachable": False, "error": "No PLEX_TOKEN configured"}
+def get_plex_libraries():
+    """Return library sections from /library/sections."""
+    headers = {"X-Plex-Token": PLEX_TOKEN, "Accept": "application/json"}
+    with timed("calls", "plex_libraries"):
+        resp = http_session.get(f"{PLEX_URL}/library/sections", headers=headers, timeout=PLEX_TIMEOUT)
+    resp.raise_for_status()
 
-    try:
-        headers = {
-            "X-Plex-Token": PLEX_TOKEN,
-            "Accept": "application/json",
-        }
-        resp = requests.get(
-            f"{PLEX_URL}/library/sections",
-            headers=headers,
-            timeout=10,
-        )
-        resp.raise_for_status()
+    libraries = []
+    for section in resp.json().get("MediaContainer", {}).get("Directory", []):
+        libraries.append({
+            "title": section.get("title"),
+            "type": section.get("type"),
+            "key": section.get("key"),
+        })
+    return libraries
 
-        data = resp.json()
-        libraries = []
-        for section in data.get("MediaContainer", {}).get("Directory", []):
-            libraries.append({
-                "title": section.get("title"),
-                "type": section.get("type"),
-                "key": section.get("key"),
-            })
 
-        streams = get_plex_sessions()
+def _plex_error(e: Exception) -> str:
+    if isinstance(e, requests.exceptions.Timeout):
+        return "Timeout connecting to Plex"
+    if isinstance(e, requests.exceptions.RequestException):
+        return str(e)
+    return f"Unexpected error: {e}"
 
-        return {
+
+class PlexCollector:
+    """Caches Plex library sections for minutes and session counts for seconds.
+
+    Both live in the shared cache, so either worker's fetch serves the other.
+    Whatever is due is fetched in parallel. If a fetch times out, that part's
+    last-known value is served flagged "stale" as long as it is younger than
+    PLEX_STALE_MAX seconds; any other failure makes Plex unreachable.
+    """
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="plex")
+        self._fetchers = {"libraries": get_plex_libraries, "streams": get_plex_sessions}
+        self._ttls = {"libraries": PLEX_LIBRARY_TTL, "streams": PLEX_SESSIONS_TTL}
+
+    def status(self) -> dict:
+        due = {
+            part: self._pool.submit(fetch)
+            for part, fetch in self._fetchers.items()
+            if shared_cache.get(f"plex:{part}") is None
+        }
+
+        values = {}
+        errors = {}  # part -> exception from this round's fetch
+        for part, future in due.items():
+            try:
+                values[part] = future.result()
+                shared_cache.set(f"plex:{part}", values[part], self._ttls[part])
+            except Exception as e:
+                errors[part] = e
+
+        for part in self._fetchers:
+            if part in values:
+                continue
+            entry = shared_cache.peek(f"plex:{part}")
+            error = errors.get(part)
+            if entry is None:
+                return {"reachable": False, "error": _plex_error(error) if error else "Plex results unavailable"}
+            # Each failed part falls back on its own last good value: only after a
+            # timeout, and only while that value is younger than PLEX_STALE_MAX
+            if error and not (
+                isinstance(error, requests.exceptions.Timeout)
+                and time.time() - entry.stored_at < PLEX_STALE_MAX
+            ):
+                return {"reachable": False, "error": _plex_error(error)}
+            values[part] = entry.value
+        error = "; ".join(dict.fromkeys(_plex_error(e) for e in errors.values())) or None
+
+        libraries = values["libraries"]
+        result = {
             "reachable": True,
             "libraries": [lib["title"] for lib in libraries],
             "library_count": len(libraries),
             "library_details": libraries,
-            "streams": streams,
+            "streams": values["streams"],
         }
-    except requests.exceptions.Timeout:
-        return {"reachable": False, "error": "Timeout connecting to Plex"}
-    except requests.exceptions.RequestException as e:
-        return {"reachable": False, "error": str(e)}
-    except Exception as e:
-        return {"reachable": False, "error": f"Unexpected error: {e}"}
+        if error:
+            result["stale"] = True
+            result["stale_reason"] = error
+        return result
+
+
+# Library sections rarely change; sessions are refreshed on every plex sample
+PLEX_TIMEOUT = 5
+PLEX_LIBRARY_TTL = int(os.environ.get("PLEX_LIBRARY_TTL", "600"))
+PLEX_SESSIONS_TTL = int(os.environ.get("PLEX_SESSIONS_TTL", "15"))
+PLEX_STALE_MAX = 600
+
+plex_collector = PlexCollector()
+
+
+def get_plex_status():
+    """Check Plex server status and library info."""
+    if not PLEX_TOKEN:
+        return {"reachable": False, "error": "No PLEX_TOKEN configured"}
+    return plex_collector.status()
+
+
+# Last good parse of SPEEDTEST_FILE, keyed by the file's (inode, mtime, size)
+_speedtest_cache = {"key": None, "data": None}
+_speedtest_lock = threading.Lock()
 
 
 def get_speedtest_results():
-    """Read speed test results from file."""
+    """Read speed test results from file, re-parsing only when it changes."""
     try:
-        path = Path(SPEEDTEST_FILE)
-        if not path.exists():
-            return {"error": "No speed test results available"}
+        st = os.stat(SPEEDTEST_FILE)
+    except FileNotFoundError:
+        return {"error": "No speed test results available"}
+    except Exception as e:
+        return {"error": str(e)}
 
-        with open(path) as f:
-            data = json.load(f)
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    with _speedtest_lock:
+        if key == _speedtest_cache["key"]:
+            return _speedtest_cache["data"]
+        previous = _speedtest_cache["data"]
 
-        return data
+    try:
+        with open(SPEEDTEST_FILE) as f:
+            data = json.load(f)
     except json.JSONDecodeError:
-        return {"error": "Invalid speed test data"}
+        # speedtest.sh rewrites the file in place, so a read can catch it half-written
+        return previous if previous is not None else {"error": "Invalid speed test data"}
     except Exception as e:
         return {"error": str(e)}
 
+    with _speedtest_lock:
+        _speedtest_cache["key"] = key
+        _speedtest_cache["data"] = data
+    return data
+
 
 def get_load_average():
     """Get system load averages."""
@@ -285,77 +718,197 @@ def parse_mdstat_array(mdstat: str, device: str, name: str, mount_point: str) ->
     return array
 
 
-def get_smart_status(device: str) -> dict:
-    """Get SMART status for a single drive."""
-    result = {
-        "device": device,
-        "smart_status": "unknown",
-        "warnings": [],
-    }
+def run_smartctl(device: str, wake: bool = False) -> str:
+    """Run smartctl -a against a drive and return its stdout.
 
-    try:
-        # Run smartctl -a to get all SMART data
+    Unless `wake` is set, `-n standby` makes smartctl bail out without
+    spinning up a drive that is in standby or sleep.
+    """
+    cmd = ["sudo", "smartctl", "-a", f"/dev/{device}"]
+    if not wake:
+        cmd[2:2] = ["-n", "standby"]
+    with timed("calls", "smartctl"):
         proc = subprocess.run(
-            ["sudo", "smartctl", "-a", f"/dev/{device}"],
+            cmd,
             capture_output=True,
             text=True,
             timeout=30,
         )
-        output = proc.stdout
-
-        # Parse overall health status
-        if "SMART overall-health self-assessment test result: PASSED" in output:
-            result["smart_status"] = "PASSED"
-        elif "SMART overall-health self-assessment test result: FAILED" in output:
-            result["smart_status"] = "FAILED"
-            result["warnings"].append("SMART self-assessment FAILED")
-
-        # Parse model and serial
-        model_match = re.search(r"Device Model:\s+(.+)", output)
-        serial_match = re.search(r"Serial Number:\s+(.+)", output)
-        if model_match:
-            result["model"] = model_match.group(1).strip()
-        if serial_match:
-            result["serial"] = serial_match.group(1).strip()
-
-        # Parse temperature - some drives use Airflow_Temperature_Cel (e.g. Samsung SSDs)
-        temp_match = re.search(r"(?:Temperature_Celsius|Airflow_Temperature_Cel).*-\s+(\d+)", output)
-        if temp_match:
-            result["temperature"] = int(temp_match.group(1))
-
-        # Parse power-on hours - RAW_VALUE is after the last '-'
-        hours_match = re.search(r"Power_On_Hours.*-\s+(\d+)", output)
-        if hours_match:
-            result["power_on_hours"] = int(hours_match.group(1))
-
-        # Parse critical attributes - RAW_VALUE is after '-' at end of line
-        # SMART format: ID ATTR_NAME FLAGS VALUE WORST THRESH TYPE UPDATED WHEN_FAILED RAW_VALUE
-        attrs = {}
-        for attr_name, attr_id in [
-            ("reallocated_sectors", "Reallocated_Sector_Ct"),
-            ("pending_sectors", "Current_Pending_Sector"),
-            ("uncorrectable", "Offline_Uncorrectable"),
-            ("spin_retry", "Spin_Retry_Count"),
-        ]:
-            # Match attribute name followed by everything up to '-' then the RAW_VALUE
-            match = re.search(rf"{attr_id}.*-\s+(\d+)", output)
-            if match:
-                val = int(match.group(1))
-                attrs[attr_name] = val
-                # Warn on non-zero values for sector-related attributes
-                if val > 0 and attr_name in ("reallocated_sectors", "pending_sectors", "uncorrectable"):
-                    result["warnings"].append(f"{attr_name}: {val}")
-
-        result["attributes"] = attrs
+    return proc.stdout
+
+
+def parse_power_state(output: str) -> str:
+    """Get drive power state (active/idle/standby/sleep/unknown) from smartctl output."""
+    # Printed when -n standby skips a sleeping drive: "Device is in STANDBY mode, exit(2)"
+    skipped = re.search(r"Device is in (\w+) mode", output)
+    if skipped:
+        return skipped.group(1).lower()
+    # Printed for drives that were awake: "Power mode is:    ACTIVE or IDLE"
+    mode = re.search(r"Power mode (?:is|was):\s+(.+)", output)
+    if not mode:
+        return "unknown"
+    mode = mode.group(1).upper()
+    if "STANDBY" in mode:
+        return "standby"
+    if "SLEEP" in mode:
+        return "sleep"
+    if "ACTIVE" in mode:
+        return "active"
+    if "IDLE" in mode:
+        return "idle"
+    return "unknown"
+
+
+def parse_smart_output(device: str, output: str) -> dict:
+    """Parse smartctl -a output into a SMART status dict."""
+    result = {
+        "device": device,
+        "smart_status": "unknown",
+        "warnings": [],
+    }
 
-    except subprocess.TimeoutExpired:
-        result["warnings"].append("smartctl timeout")
-    except Exception as e:
-        result["warnings"].append(f"Error: {str(e)}")
+    # Parse overall health status
+    if "SMART overall-health self-assessment test result: PASSED" in output:
+        result["smart_status"] = "PASSED"
+    elif "SMART overall-health self-assessment test result: FAILED" in output:
+        result["smart_status"] = "FAILED"
+        result["warnings"].append("SMART self-assessment FAILED")
+
+    # Parse model and serial
+    model_match = re.search(r"Device Model:\s+(.+)", output)
+    serial_match = re.search(r"Serial Number:\s+(.+)", output)
+    if model_match:
+        result["model"] = model_match.group(1).strip()
+    if serial_match:
+        result["serial"] = serial_match.group(1).strip()
+
+    # Parse temperature - some drives use Airflow_Temperature_Cel (e.g. Samsung SSDs)
+    temp_match = re.search(r"(?:Temperature_Celsius|Airflow_Temperature_Cel).*-\s+(\d+)", output)
+    if temp_match:
+        result["temperature"] = int(temp_match.group(1))
+
+    # Parse power-on hours - RAW_VALUE is after the last '-'
+    hours_match = re.search(r"Power_On_Hours.*-\s+(\d+)", output)
+    if hours_match:
+        result["power_on_hours"] = int(hours_match.group(1))
+
+    # Parse critical attributes - RAW_VALUE is after '-' at end of line
+    # SMART format: ID ATTR_NAME FLAGS VALUE WORST THRESH TYPE UPDATED WHEN_FAILED RAW_VALUE
+    attrs = {}
+    for attr_name, attr_id in [
+        ("reallocated_sectors", "Reallocated_Sector_Ct"),
+        ("pending_sectors", "Current_Pending_Sector"),
+        ("uncorrectable", "Offline_Uncorrectable"),
+        ("spin_retry", "Spin_Retry_Count"),
+    ]:
+        # Match attribute name followed by everything up to '-' then the RAW_VALUE
+        match = re.search(rf"{attr_id}.*-\s+(\d+)", output)
+        if match:
+            val = int(match.group(1))
+            attrs[attr_name] = val
+            # Warn on non-zero values for sector-related attributes
+            if val > 0 and attr_name in ("reallocated_sectors", "pending_sectors", "uncorrectable"):
+                result["warnings"].append(f"{attr_name}: {val}")
 
+    result["attributes"] = attrs
     return result
 
 
+class SmartCollector:
+    """Probes drives concurrently on a bounded pool, caching each device's result.
+
+    Results live in the shared cache ("smart:<device>"), so a probe by either
+    worker serves both. Fresh results are served for SMART_CACHE_TTL seconds. A probe that
+    fails or is still running when the batch deadline passes falls back to the
+    last good result, marked "stale", instead of holding up the caller.
+
+    Probes never wake a drive in standby: such drives report their last cached
+    attributes plus "power_state". Pass force=True to read them anyway.
+    """
+
+    def __init__(self, ttl: int, max_workers: int, batch_timeout: float):
+        self._ttl = ttl
+        self._batch_timeout = batch_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="smart")
+        self._lock = threading.Lock()
+        self._inflight = {}  # (device, force) -> Future
+
+    def _cached_result(self, device: str) -> dict | None:
+        entry = shared_cache.peek(f"smart:{device}")
+        return entry.value if entry else None
+
+    def _probe(self, device: str, force: bool) -> dict:
+        try:
+            output = run_smartctl(device, wake=force)
+            power_state = parse_power_state(output)
+            if power_state in ("standby", "sleep"):
+                # Not read (and not woken) - keep the cache as-is so the next probe retries
+                cached = self._cached_result(device)
+                if cached is None:
+                    return {"device": device, "smart_status": "unknown", "warnings": [],
+                            "power_state": power_state}
+                return {**cached, "power_state": power_state}
+
+            result = parse_smart_output(device, output)
+            result["power_state"] = power_state
+            result["sampled_at"] = datetime.now(timezone.utc).isoformat()
+            shared_cache.set(f"smart:{device}", result, self._ttl)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop((device, force), None)
+
+    def _submit(self, device: str, force: bool) -> Future:
+        with self._lock:
+            future = self._inflight.get((device, force))
+            if future is None:
+                future = self._pool.submit(self._probe, device, force)
+                self._inflight[(device, force)] = future
+            return future
+
+    def _fallback(self, device: str, error: str) -> dict:
+        cached = self._cached_result(device)
+        if cached is None:
+            return {"device": device, "smart_status": "unknown", "warnings": [error]}
+        return {**cached, "stale": True, "stale_reason": error}
+
+    def collect(self, devices: list, force: bool = False, block: bool = False) -> dict:
+        """Return {device: SMART status} for all devices.
+
+        force: ignore the cache and wake drives in standby.
+        block: wait for every probe instead of the batch timeout.
+        """
+        results = {}
+        futures = {}
+        for device in devices:
+            cached = None if force else shared_cache.get(f"smart:{device}")
+            if cached:
+                results[device] = cached.value
+            else:
+                futures[device] = self._submit(device, force)
+
+        if futures:
+            wait(futures.values(), timeout=None if block else self._batch_timeout)
+        for device, future in futures.items():
+            if not future.done():
+                results[device] = self._fallback(device, "smartctl timeout")
+            elif isinstance(future.exception(), subprocess.TimeoutExpired):
+                results[device] = self._fallback(device, "smartctl timeout")
+            elif future.exception() is not None:
+                results[device] = self._fallback(device, f"Error: {future.exception()}")
+            else:
+                results[device] = future.result()
+        return results
+
+
+# SMART attributes change slowly, so probe each drive at most every SMART_CACHE_TTL seconds
+SMART_CACHE_TTL = int(os.environ.get("SMART_CACHE_TTL", "1800"))
+SMART_MAX_WORKERS = int(os.environ.get("SMART_MAX_WORKERS", "4"))
+SMART_BATCH_TIMEOUT = 20
+
+smart_collector = SmartCollector(SMART_CACHE_TTL, SMART_MAX_WORKERS, SMART_BATCH_TIMEOUT)
+
+
 # Single drives to always SMART-check, keyed by device name
 SYSTEM_DRIVES = {
     "sda": {"name": "SDA (OS SSD)", "type": "system_ssd", "mount": "/"},
@@ -363,73 +916,127 @@ SYSTEM_DRIVES = {
 }
 
 
-def get_cpu_temps() -> dict | None:
-    """Get CPU temperatures from lm_sensors coretemp."""
+HWMON_ROOT = "/sys/class/hwmon"
+HWMON_REDISCOVER_INTERVAL = 300  # retry discovery this often if no coretemp sensors were found
+
+
+def _read_millidegrees(path: str) -> float | None:
     try:
-        proc = subprocess.run(
-            ["sensors"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        output = proc.stdout
-        result = {"package": None, "cores": []}
-        in_coretemp = False
-        for line in output.splitlines():
-            if "coretemp" in line.lower():
-                in_coretemp = True
-                continue
-            if in_coretemp and not line.strip():
-                in_coretemp = False
-                continue
-            if not in_coretemp:
+        with open(path) as f:
+            return int(f.read().strip()) / 1000
+    except (OSError, ValueError):
+        return None
+
+
+class CoretempReader:
+    """Reads coretemp package/core temperatures straight from hwmon sysfs.
+
+    Sensor paths and their high/crit thresholds are discovered once; each
+    sample then only reads the temp*_input files.
+    """
+
+    def __init__(self, root: str = HWMON_ROOT):
+        self._root = root
+        self._lock = threading.Lock()
+        self._sensors = None  # [(kind, id, input_path, high, crit)]
+        self._discovered_at = 0.0
+
+    def _discover(self) -> list:
+        sensors = []
+        for hwmon in sorted(Path(self._root).glob("hwmon*")):
+            try:
+                if (hwmon / "name").read_text().strip() != "coretemp":
+                    continue
+            except OSError:
                 continue
-            pkg = re.match(
-                r"Package id \d+:\s+\+([\d.]+)°C.*?high = \+([\d.]+).*?crit = \+([\d.]+)",
-                line,
-            )
-            if pkg:
-                result["package"] = {
-                    "temp": float(pkg.group(1)),
-                    "high": float(pkg.group(2)),
-                    "crit": float(pkg.group(3)),
-                }
+            for label_path in sorted(hwmon.glob("temp*_label")):
+                try:
+                    label = label_path.read_text().strip()
+                except OSError:
+                    continue
+                # Labels are "Package id 0" or "Core 3"
+                match = re.match(r"(Package id|Core) (\d+)$", label)
+                if not match:
+                    continue
+                prefix = str(label_path)[: -len("_label")]
+                sensors.append((
+                    "package" if match.group(1) == "Package id" else "core",
+                    int(match.group(2)),
+                    f"{prefix}_input",
+                    _read_millidegrees(f"{prefix}_max"),
+                    _read_millidegrees(f"{prefix}_crit"),
+                ))
+        return sensors
+
+    def _get_sensors(self) -> list:
+        with self._lock:
+            stale = not self._sensors and time.monotonic() - self._discovered_at > HWMON_REDISCOVER_INTERVAL
+            if self._sensors is None or stale:
+                self._sensors = self._discover()
+                self._discovered_at = time.monotonic()
+            return self._sensors
+
+    def core_ids(self) -> list:
+        """Sorted IDs of the discovered per-core sensors."""
+        return sorted({sensor_id for kind, sensor_id, *_ in self._get_sensors() if kind == "core"})
+
+    def read(self) -> dict | None:
+        result = {"package": None, "cores": []}
+        for kind, sensor_id, input_path, high, crit in self._get_sensors():
+            temp = _read_millidegrees(input_path)
+            if temp is None:
+                # hwmon numbering can change when the driver reloads - rediscover next time
+                with self._lock:
+                    self._sensors = None
                 continue
-            core = re.match(
-                r"Core (\d+):\s+\+([\d.]+)°C.*?high = \+([\d.]+).*?crit = \+([\d.]+)",
-                line,
-            )
-            if core:
-                result["cores"].append({
-                    "id": int(core.group(1)),
-                    "temp": float(core.group(2)),
-                    "high": float(core.group(3)),
-                    "crit": float(core.group(4)),
-                })
+            reading = {"temp": temp, "high": high, "crit": crit}
+            if kind == "package":
+                # Report the first socket's package, as a single-socket host has only one
+                if result["package"] is None:
+                    result["package"] = reading
+            else:
+                result["cores"].append({"id": sensor_id, **reading})
+        result["cores"].sort(key=lambda core: core["id"])
         return result if result["package"] else None
+
+
+coretemp_reader = CoretempReader()
+
+
+def get_cpu_temps() -> dict | None:
+    """Get CPU temperatures from the coretemp hwmon driver."""
+    try:
+        return coretemp_reader.read()
     except Exception:
         return None
 
 
-def get_all_smart_status() -> list:
-    """Get SMART status for all RAID drives in md1."""
-    drives = []
+def get_raid_members(array_device: str = "md1") -> list:
+    """Return the sorted member drive names of a software RAID array."""
     try:
         with open("/proc/mdstat", "r") as f:
             mdstat = f.read()
 
         # Extract drive names from md1 line
         # Format: md1 : active raid5 sdi[6] sdd[0] sdf[4] sde[5] sdj[1] sdc[3] sdh[8] sdg[7]
-        match = re.search(r"md1\s*:\s*active\s+\w+\s+(.+)\n", mdstat)
+        match = re.search(rf"{array_device}\s*:\s*active\s+\w+\s+(.+)\n", mdstat)
         if match:
             # Parse "sdi[6] sdd[0] sdf[4]..." format
-            drive_pattern = re.findall(r"(\w+)\[\d+\]", match.group(1))
-            for device in sorted(drive_pattern):
-                drives.append(get_smart_status(device))
+            return sorted(re.findall(r"(\w+)\[\d+\]", match.group(1)))
     except Exception as e:
         app.logger.error(f"Failed to get SMART status: {e}")
+    return []
+
 
-    return drives
+def get_all_smart_status(results: dict | None = None) -> list:
+    """Get SMART status for all RAID drives in md1.
+
+    `results` may hold SMART results already collected for these drives.
+    """
+    devices = get_raid_members()
+    if results is None:
+        results = smart_collector.collect(devices)
+    return [results[device] for device in devices]
 
 
 def _apply_capacity_thresholds(array: dict, current_overall: str):
@@ -450,9 +1057,12 @@ def get_storage_status():
     arrays = []
     overall_status = "healthy"
 
+    # Probe system drives and RAID members in one concurrent batch
+    smart_results = smart_collector.collect(list(SYSTEM_DRIVES) + get_raid_members())
+
     # Single drives (OS SSD, GAMES HDD, etc.) — shown first
     for device, info in SYSTEM_DRIVES.items():
-        smart = get_smart_status(device)
+        smart = smart_results[device]
         status = "healthy"
         if smart.get("smart_status") == "FAILED":
             status = "failed"
@@ -475,6 +1085,8 @@ def get_storage_status():
             "temperature": smart.get("temperature"),
             "power_on_hours": smart.get("power_on_hours"),
             "warnings": smart.get("warnings", []),
+            "power_state": smart.get("power_state"),
+            "stale": smart.get("stale", False),
         }
         try:
             usage = psutil.disk_usage(mount_host)
@@ -526,7 +1138,7 @@ def get_storage_status():
     arrays.append(camraid)
 
     # Get SMART status for all RAID drives
-    drives = get_all_smart_status()
+    drives = get_all_smart_status(smart_results)
 
     # Update overall status based on drive health
     if any(d.get("smart_status") == "FAILED" for d in drives):
@@ -543,8 +1155,16 @@ def get_storage_status():
     }
 
 
+# The public IP only changes on VPN/ISP failover; dns_manager polls it for failback
+PUBLIC_IP_TTL = int(os.environ.get("PUBLIC_IP_TTL", "60"))
+
+
 def get_public_ip():
     """Get public IP address using external service."""
+    cached = shared_cache.get("public-ip")
+    if cached:
+        return cached.value
+
     services = [
         "https://api.ipify.org",
         "https://ifconfig.me/ip",
@@ -552,185 +1172,623 @@ def get_public_ip():
     ]
     for service in services:
         try:
-            resp = requests.get(service, timeout=5)
+            resp = http_session.get(service, timeout=5)
             resp.raise_for_status()
             ip = resp.text.strip()
             if ip:
-                return {"ip": ip, "source": service}
+                result = {"ip": ip, "source": service}
+                shared_cache.set("public-ip", result, PUBLIC_IP_TTL)
+                return result
         except requests.exceptions.RequestException:
             continue
     return {"error": "Could not determine public IP"}
 
 
+_docker_client = None
+_docker_client_lock = threading.Lock()
+
+
 def get_docker_client():
-    """Get Docker client, or None if unavailable."""
-    try:
-        return docker.from_env()
-    except Exception:
-        return None
+    """Get this worker's shared Docker client, or None if unavailable."""
+    global _docker_client
+    with _docker_client_lock:
+        if _docker_client is None:
+            try:
+                _docker_client = docker.from_env()
+            except Exception:
+                return None
+        return _docker_client
 
 
-def get_minecraft_memory():
-    """Get Minecraft container memory usage from cgroup stats."""
+def docker_api():
+    """The shared client's low-level API, or RuntimeError if Docker is unavailable."""
     client = get_docker_client()
     if not client:
-        return None
-    try:
-        container = client.containers.get("minecraft")
-        if container.status != "running":
-            return None
-        stats = container.stats(stream=False)
-        mem = stats.get("memory_stats", {})
-        usage = mem.get("usage", 0)
-        # Subtract page cache to match what `docker stats` shows
-        cache = mem.get("stats", {}).get("cache", 0)
-        rss = max(usage - cache, 0)
-
-        # Use MAX_MEMORY (JVM heap limit) as the ceiling instead of the cgroup limit
-        env_vars = container.attrs.get("Config", {}).get("Env", [])
-        max_memory_str = next((e.split("=", 1)[1] for e in env_vars if e.startswith("MAX_MEMORY=")), None)
-        if max_memory_str:
-            unit = max_memory_str[-1].upper()
-            value = float(max_memory_str[:-1])
-            multipliers = {"G": 1024 ** 3, "M": 1024 ** 2, "K": 1024}
-            limit = int(value * multipliers.get(unit, 1))
-        else:
-            limit = mem.get("limit", 0)
+        raise RuntimeError("Docker unavailable")
+    return client.api
+
+
+def docker_exec(container: str, cmd: list) -> tuple[int, str, str]:
+    """Run cmd in a container over the exec API; returns (exit code, stdout, stderr)."""
+    api = docker_api()
+    with timed("calls", "docker_exec"):
+        exec_id = api.exec_create(container, cmd)
+        stdout, stderr = api.exec_start(exec_id, demux=True)
+        exit_code = api.exec_inspect(exec_id)["ExitCode"]
+    return exit_code, (stdout or b"").decode(errors="replace"), (stderr or b"").decode(errors="replace")
+
+
+def docker_read_file(container: str, path: str) -> bytes:
+    """Read one file out of a container with get_archive (no process started in it)."""
+    with timed("calls", "docker_get_archive"):
+        stream, _ = docker_api().get_archive(container, path)
+        archive = b"".join(stream)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        member = tar.next()
+        return tar.extractfile(member).read()
+
+
+# Approximate seconds per unit in `docker ps` status strings ("Up 3 hours")
+_STATUS_UPTIME_UNITS = {
+    "second": 1, "minute": 60, "hour": 3600, "day": 86400,
+    "week": 7 * 86400, "month": 30 * 86400, "year": 365 * 86400,
+}
 
-        if limit <= 0:
-            return None
-        return {
-            "used_gb": round(rss / (1024 ** 3), 2),
-            "limit_gb": round(limit / (1024 ** 3), 2),
-            "percent": round((rss / limit) * 100, 1),
-        }
-    except (docker.errors.NotFound, Exception):
+# Container ID -> State.StartedAt, so uptime only costs an inspect after a (re)start
+_started_at_cache = {}
+
+
+def _status_uptime_seconds(status: str) -> int | None:
+    """Approximate uptime from a `docker ps` status like "Up 3 hours (healthy)"."""
+    match = re.match(r"Up (Less than a|About an?|\d+) (second|minute|hour|day|week|month|year)", status)
+    if not match:
         return None
+    count = match.group(1)
+    if count == "Less than a":
+        return 0
+    count = int(count) if count.isdigit() else 1
+    return count * _STATUS_UPTIME_UNITS[match.group(2)]
 
 
-def check_container_status(container_name: str) -> dict:
-    """Check if a Docker container is running and healthy."""
-    client = get_docker_client()
-    if not client:
-        return {"running": None, "error": "Docker unavailable"}
+def _status_health(status: str) -> str | None:
+    """Extract health (healthy, unhealthy, starting) from a `docker ps` status string."""
+    match = re.search(r"\((healthy|unhealthy|health: starting)\)", status)
+    if not match:
+        return None
+    return "starting" if match.group(1) == "health: starting" else match.group(1)
+
 
+def _uptime_seconds(started_at: str | None) -> int | None:
+    """Seconds since a Docker StartedAt timestamp, or None if it can't be parsed."""
+    if not started_at:
+        return None
     try:
-        container = client.containers.get(container_name)
-        status = container.status
-        health = container.attrs.get("State", {}).get("Health", {}).get("Status")
-
-        # Get uptime if running
-        uptime_seconds = None
-        if status == "running":
-            started_at = container.attrs.get("State", {}).get("StartedAt")
-            if started_at:
-                try:
-                    # Parse ISO format: 2026-01-13T02:15:00.123456789Z
-                    started_str = started_at.split(".")[0]  # Remove nanoseconds
-                    if started_str.endswith("Z"):
-                        started_str = started_str[:-1]
-                    started_dt = datetime.fromisoformat(started_str).replace(tzinfo=timezone.utc)
-                    uptime_seconds = int((datetime.now(timezone.utc) - started_dt).total_seconds())
-                except Exception:
-                    pass  # Skip uptime if parsing fails
+        # Parse ISO format: 2026-01-13T02:15:00.123456789Z
+        started_str = started_at.split(".")[0]  # Remove nanoseconds
+        if started_str.endswith("Z"):
+            started_str = started_str[:-1]
+        started_dt = datetime.fromisoformat(started_str).replace(tzinfo=timezone.utc)
+        return int((datetime.now(timezone.utc) - started_dt).total_seconds())
+    except Exception:
+        return None  # Skip uptime if parsing fails
 
-        return {
-            "running": status == "running",
-            "status": status,
-            "health": health,  # healthy, unhealthy, starting, or None
-            "uptime_seconds": uptime_seconds,
-        }
-    except docker.errors.NotFound:
-        return {"running": False, "status": "not_found"}
-    except Exception as e:
-        return {"running": None, "error": str(e)[:50]}
 
+# How long a list-call snapshot is shared while the container table is out of sync
+CONTAINER_INDEX_TTL = 5
 
-def check_local_port(port: int, path: str = "/") -> dict:
-    """Check if a service responds on a local port."""
-    url = f"{HOST_URL}:{port}{path}"
-    try:
-        resp = requests.get(url, timeout=5, allow_redirects=True)
-        # Accept 2xx, 3xx, and 401 (protected but running)
-        is_up = resp.status_code < 400 or resp.status_code == 401
-        return {
-            "responding": is_up,
-            "status_code": resp.status_code,
-        }
-    except requests.exceptions.Timeout:
-        return {"responding": False, "error": "timeout"}
-    except requests.exceptions.RequestException as e:
-        return {"responding": False, "error": str(e)[:50]}
 
+def get_container_index() -> dict | None:
+    """Snapshot all containers keyed by container name.
 
-def check_tcp_port(port: int) -> dict:
-    """Check if a raw TCP port is open (for non-HTTP services like game servers)."""
-    import socket
-    host = HOST_URL.replace("http://", "")
-    try:
-        with socket.create_connection((host, port), timeout=5):
-            return {"responding": True}
-    except socket.timeout:
-        return {"responding": False, "error": "timeout"}
-    except OSError as e:
-        return {"responding": False, "error": str(e)[:50]}
+    Served from the events-fed container_table when it is in sync, otherwise
+    from a single list call, shared between workers for CONTAINER_INDEX_TTL.
+    Returns None if Docker is unavailable. Each record holds id, name,
+    status, health and network_mode, plus started_at (table) or the raw
+    `docker ps` status text (list call).
+    """
+    if container_table.synced:
+        return container_table.snapshot()
 
+    cached = shared_cache.get("containers")
+    if cached:
+        return cached.value
 
-def get_transmission_port() -> int:
-    """Get the correct Transmission port based on active VPN."""
     client = get_docker_client()
     if not client:
-        return 9091  # Default fallback
-
+        return None
     try:
-        transmission = client.containers.get("transmission")
-        network_mode = transmission.attrs.get("HostConfig", {}).get("NetworkMode", "")
+        with timed("calls", "docker_list"):
+            summaries = client.api.containers(all=True)
+    except Exception as e:
+        app.logger.error(f"Failed to list containers: {e}")
+        return None
 
-        # Network mode is "container:<id>" - get the container name
-        if network_mode.startswith("container:"):
-            container_id = network_mode.replace("container:", "")
-            try:
-                vpn_container = client.containers.get(container_id)
-                vpn_name = vpn_container.name
-                # Find matching VPN location and return its port
-                for config in VPN_LOCATIONS.values():
-                    if config["container"] == vpn_name:
-                        return config["port"]
-            except docker.errors.NotFound:
-                pass
-    except docker.errors.NotFound:
-        pass
+    index = {}
+    for summary in summaries:
+        status_text = summary.get("Status", "")
+        for name in summary.get("Names", []):
+            index[name.lstrip("/")] = {
+                "id": summary["Id"],
+                "name": name.lstrip("/"),
+                "status": summary.get("State"),
+                "health": _status_health(status_text),
+                "network_mode": summary.get("HostConfig", {}).get("NetworkMode", ""),
+                "status_text": status_text,
+            }
+    shared_cache.set("containers", index, CONTAINER_INDEX_TTL)
+    return index
 
+
+def container_started_at(record: dict) -> str | None:
+    """Get a running container's StartedAt, inspecting only when not cached or restarted."""
+    if record["status"] != "running":
+        return None
+    if "started_at" in record:
+        return record["started_at"]
+    cached = _started_at_cache.get(record["id"])
+    if cached:
+        # A `docker ps` uptime far below the cached one means the container restarted
+        approx = _status_uptime_seconds(record["status_text"])
+        precise = _uptime_seconds(cached)
+        if approx is None or precise is None or precise - approx <= max(approx, 60):
+            return cached
+
+    client = get_docker_client()
+    if not client:
+        return None
+    try:
+        started_at = client.api.inspect_container(record["id"]).get("State", {}).get("StartedAt")
+    except Exception:
+        return None
+    _started_at_cache[record["id"]] = started_at
+    return started_at
+
+
+def find_container_by_id(index: dict, container_id: str) -> dict | None:
+    """Look up a container record by (full or short) ID."""
+    for record in index.values():
+        if record["id"].startswith(container_id):
+            return record
+    return None
+
+
+def get_active_vpn_location(index: dict) -> str | None:
+    """Return the VPN location Transmission is routed through.
+
+    None if Transmission isn't found (or uses no known VPN), "unknown" if its
+    VPN container was removed/recreated.
+    """
+    transmission = index.get("transmission")
+    if not transmission:
+        return None
+
+    # Network mode is "container:<id>" - resolve the ID to a container name
+    network_mode = transmission["network_mode"]
+    if not network_mode.startswith("container:"):
+        return None
+    vpn_container = find_container_by_id(index, network_mode.replace("container:", ""))
+    if not vpn_container:
+        return "unknown"
+    for loc, config in VPN_LOCATIONS.items():
+        if config["container"] == vpn_container["name"]:
+            return loc
+    return None
+
+
+# ============== CONTAINER STATE TABLE ==============
+# Subscribes to the Docker events stream so container state answers come from
+# memory and reflect starts, stops and health changes as they happen.
+
+# Events that change a container's status, start time or network mode
+CONTAINER_STATE_EVENTS = {
+    "create", "start", "restart", "stop", "die", "kill", "oom",
+    "pause", "unpause", "rename", "update",
+}
+
+
+def _container_record(attrs: dict) -> dict:
+    """Build a container state record from `docker inspect` output."""
+    state = attrs.get("State", {})
+    return {
+        "id": attrs["Id"],
+        "name": attrs.get("Name", "").lstrip("/"),
+        "status": state.get("Status"),
+        "health": (state.get("Health") or {}).get("Status"),
+        "started_at": state.get("StartedAt"),
+        "network_mode": attrs.get("HostConfig", {}).get("NetworkMode", ""),
+    }
+
+
+class ContainerStateTable:
+    """Container state kept current from the Docker events stream.
+
+    The table is fully resynced on startup and after every stream reconnect;
+    `synced` is False while the stream is down, so callers can fall back to
+    listing containers directly.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = {}  # container ID -> record
+        self._synced = threading.Event()
+        self._listeners = []
+        self._started = False
+
+    def add_listener(self, callback):
+        """Call callback(record) when a container changes; removed ones get {"name", "removed": True}."""
+        self._listeners.append(callback)
+
+    def _notify(self, record: dict):
+        for callback in self._listeners:
+            try:
+                callback(record)
+            except Exception as e:
+                app.logger.error(f"Container listener failed: {e}")
+
+    @property
+    def synced(self) -> bool:
+        return self._synced.is_set()
+
+    def snapshot(self) -> dict:
+        """Return a copy of the table keyed by container name."""
+        with self._lock:
+            return {record["name"]: dict(record) for record in self._records.values()}
+
+    def start(self):
+        """Start the events subscriber thread (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        thread = threading.Thread(target=self._run, name="container-events")
+        thread.daemon = True
+        thread.start()
+
+    def _run(self):
+        backoff = 1
+        while True:
+            client = get_docker_client()
+            if client:
+                try:
+                    # Subscribe before resyncing so no event between the two is lost
+                    events = client.api.events(decode=True, filters={"type": "container"})
+                    self._resync(client)
+                    self._synced.set()
+                    backoff = 1
+                    for event in events:
+                        self._apply(client, event)
+                    app.logger.warning("Docker events stream closed, reconnecting")
+                except Exception as e:
+                    app.logger.error(f"Docker events stream failed: {e}")
+            self._synced.clear()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def _inspect(self, client, container_id: str) -> dict | None:
+        try:
+            return _container_record(client.api.inspect_container(container_id))
+        except docker.errors.NotFound:
+            return None
+
+    def _resync(self, client):
+        records = {}
+        for summary in client.api.containers(all=True):
+            record = self._inspect(client, summary["Id"])
+            if record:
+                records[record["id"]] = record
+        with self._lock:
+            self._records = records
+
+    def _apply(self, client, event: dict):
+        action = event.get("Action") or event.get("status") or ""
+        container_id = event.get("Actor", {}).get("ID") or event.get("id")
+        if not container_id:
+            return
+
+        if action.startswith("health_status"):
+            # Action is "health_status: healthy" (or unhealthy/starting)
+            with self._lock:
+                record = self._records.get(container_id)
+                if not record:
+                    return
+                record["health"] = action.split(":", 1)[1].strip()
+                changed = dict(record)
+        elif action == "destroy" or action in CONTAINER_STATE_EVENTS:
+            record = self._inspect(client, container_id) if action != "destroy" else None
+            with self._lock:
+                previous = self._records.get(container_id)
+                if record:
+                    self._records[container_id] = record
+                else:
+                    self._records.pop(container_id, None)
+            if record == previous:
+                return
+            if record:
+                changed = dict(record)
+            elif previous:
+                changed = {"name": previous["name"], "removed": True}
+            else:
+                return
+        else:
+            return
+        self._notify(changed)
+
+
+container_table = ContainerStateTable()
+container_table.start()
+
+
+# ============== CGROUP STATS ==============
+# Per-container memory, CPU and I/O read straight from the host's cgroup v2
+# tree. `docker stats` (container.stats(stream=False)) blocks 1-2 seconds
+# while the daemon takes two CPU samples; these files cost microseconds.
+
+CGROUP_ROOT = os.environ.get("CGROUP_ROOT", "/host/sys/fs/cgroup")
+# systemd cgroup driver first (Docker's default on systemd hosts), then cgroupfs
+CGROUP_LAYOUTS = ("system.slice/docker-{id}.scope", "docker/{id}")
+
+# Container ID -> cgroup directory, found once per container
+_cgroup_paths = {}
+# Container ID -> Config.Env, inspected once per container. Kept in-process
+# only - env holds secrets, so it never goes into the shared cache.
+_container_env_cache = {}
+
+
+def container_cgroup(container_id: str) -> str | None:
+    """Find a container's cgroup v2 directory, or None if it has none (stopped, or a v1 host)."""
+    path = _cgroup_paths.get(container_id)
+    if path:
+        return path
+    for layout in CGROUP_LAYOUTS:
+        path = os.path.join(CGROUP_ROOT, layout.format(id=container_id))
+        if os.path.isfile(os.path.join(path, "memory.current")):
+            _cgroup_paths[container_id] = path
+            return path
+    return None
+
+
+def _read_cgroup_keyed(path: str) -> dict:
+    """Parse a flat-keyed cgroup file ("key value" per line) into ints."""
+    values = {}
+    with open(path) as f:
+        for line in f:
+            key, _, value = line.partition(" ")
+            values[key] = int(value)
+    return values
+
+
+def _read_cgroup_io(path: str) -> tuple[int, int]:
+    """Sum rbytes/wbytes over every device in io.stat."""
+    read_bytes = write_bytes = 0
+    with open(path) as f:
+        for line in f:
+            for field in line.split()[1:]:
+                key, _, value = field.partition("=")
+                if key == "rbytes":
+                    read_bytes += int(value)
+                elif key == "wbytes":
+                    write_bytes += int(value)
+    return read_bytes, write_bytes
+
+
+def _read_optional_cgroup_file(path: str, parse):
+    """parse(path), or None when the file is missing (e.g. the io controller isn't enabled)."""
+    try:
+        return parse(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_cgroup_value(path: str) -> str:
+    with open(path) as f:
+        return f.read().strip()
+
+
+def read_cgroup_stats(container_id: str) -> dict | None:
+    """Memory, CPU and block I/O counters for a running container.
+
+    memory_used_bytes matches `docker stats` (memory.current minus inactive
+    page cache). memory_limit_bytes is None when the cgroup is unlimited. CPU
+    and I/O figures are cumulative counters since the container started.
+    Fields whose cgroup file is missing (a controller not enabled for the
+    cgroup) are None. Returns None if the cgroup can't be found or read.
+    """
+    path = container_cgroup(container_id)
+    if not path:
+        return None
+    try:
+        with timed("calls", "cgroup_read"):
+            current = int(_read_cgroup_value(os.path.join(path, "memory.current")))
+            limit = _read_optional_cgroup_file(os.path.join(path, "memory.max"), _read_cgroup_value)
+            memory = _read_optional_cgroup_file(os.path.join(path, "memory.stat"), _read_cgroup_keyed) or {}
+            cpu = _read_optional_cgroup_file(os.path.join(path, "cpu.stat"), _read_cgroup_keyed) or {}
+            io_bytes = _read_optional_cgroup_file(os.path.join(path, "io.stat"), _read_cgroup_io)
+    except (OSError, ValueError):
+        # Container stopped (cgroup removed) - look it up again next time
+        _cgroup_paths.pop(container_id, None)
+        return None
+    return {
+        "memory_current_bytes": current,
+        "memory_used_bytes": max(current - memory.get("inactive_file", 0), 0),
+        "memory_anon_bytes": memory.get("anon"),
+        "memory_file_bytes": memory.get("file"),
+        "memory_limit_bytes": int(limit) if limit and limit != "max" else None,
+        "cpu_usage_usec": cpu.get("usage_usec"),
+        "cpu_user_usec": cpu.get("user_usec"),
+        "cpu_system_usec": cpu.get("system_usec"),
+        "io_read_bytes": io_bytes[0] if io_bytes else None,
+        "io_write_bytes": io_bytes[1] if io_bytes else None,
+    }
+
+
+def container_env(container_id: str) -> list:
+    """A container's Config.Env, inspected once per container ID."""
+    env = _container_env_cache.get(container_id)
+    if env is None:
+        client = get_docker_client()
+        if not client:
+            return []
+        try:
+            env = client.api.inspect_container(container_id).get("Config", {}).get("Env") or []
+        except Exception:
+            return []
+        _container_env_cache[container_id] = env
+    return env
+
+
+def get_minecraft_memory():
+    """Get Minecraft container memory usage from its cgroup."""
+    record = (get_container_index() or {}).get("minecraft")
+    if not record or record["status"] != "running":
+        return None
+    stats = read_cgroup_stats(record["id"])
+    if not stats:
+        return None
+    rss = stats["memory_used_bytes"]
+
+    # Use MAX_MEMORY (JVM heap limit) as the ceiling instead of the cgroup limit
+    env_vars = container_env(record["id"])
+    max_memory_str = next((e.split("=", 1)[1] for e in env_vars if e.startswith("MAX_MEMORY=")), None)
+    try:
+        if max_memory_str:
+            unit = max_memory_str[-1].upper()
+            value = float(max_memory_str[:-1])
+            multipliers = {"G": 1024 ** 3, "M": 1024 ** 2, "K": 1024}
+            limit = int(value * multipliers.get(unit, 1))
+        else:
+            # Unlimited cgroups report host memory, as `docker stats` does
+            limit = stats["memory_limit_bytes"] or psutil.virtual_memory().total
+    except ValueError:
+        return None
+
+    if limit <= 0:
+        return None
+    return {
+        "used_gb": round(rss / (1024 ** 3), 2),
+        "limit_gb": round(limit / (1024 ** 3), 2),
+        "percent": round((rss / limit) * 100, 1),
+    }
+
+
+def check_container_status(container_name: str, index: dict | None = None) -> dict:
+    """Check if a Docker container is running and healthy.
+
+    Pass a get_container_index() snapshot to avoid another Docker round trip.
+    """
+    if index is None:
+        index = get_container_index()
+    if index is None:
+        return {"running": None, "error": "Docker unavailable"}
+
+    record = index.get(container_name)
+    if not record:
+        return {"running": False, "status": "not_found"}
+
+    return {
+        "running": record["status"] == "running",
+        "status": record["status"],
+        "health": record["health"],  # healthy, unhealthy, starting, or None
+        "uptime_seconds": _uptime_seconds(container_started_at(record)),
+    }
+
+
+def check_local_port(port: int, path: str = "/", timeout: float = 5) -> dict:
+    """Check if a service responds on a local port."""
+    url = f"{HOST_URL}:{port}{path}"
+    try:
+        resp = http_session.get(url, timeout=timeout, allow_redirects=True)
+        # Accept 2xx, 3xx, and 401 (protected but running)
+        is_up = resp.status_code < 400 or resp.status_code == 401
+        return {
+            "responding": is_up,
+            "status_code": resp.status_code,
+        }
+    except requests.exceptions.Timeout:
+        return {"responding": False, "error": "timeout"}
+    except requests.exceptions.RequestException as e:
+        return {"responding": False, "error": str(e)[:50]}
+
+
+def check_tcp_port(port: int, timeout: float = 5) -> dict:
+    """Check if a raw TCP port is open (for non-HTTP services like game servers)."""
+    import socket
+    host = HOST_URL.replace("http://", "")
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return {"responding": True}
+    except socket.timeout:
+        return {"responding": False, "error": "timeout"}
+    except OSError as e:
+        return {"responding": False, "error": str(e)[:50]}
+
+
+def get_transmission_port(index: dict | None = None) -> int:
+    """Get the correct Transmission port based on active VPN."""
+    if index is None:
+        index = get_container_index()
+    if index is None:
+        return 9091  # Default fallback
+
+    location = get_active_vpn_location(index)
+    if location in VPN_LOCATIONS:
+        return VPN_LOCATIONS[location]["port"]
     return 9091  # Default fallback
 
 
+# Port probes run concurrently: each has its own timeout, and any probe still
+# pending at the overall deadline is reported as "deadline" instead of blocking
+PORT_PROBE_TIMEOUT = 5
+SERVICES_DEADLINE = float(os.environ.get("SERVICES_DEADLINE", "15"))
+
+_probe_pool = ThreadPoolExecutor(max_workers=len(SERVICE_CHECKS), thread_name_prefix="probe")
+
+
+def probe_service_port(svc: dict, port: int) -> dict:
+    """Probe a service's local port (HTTP or raw TCP), adding latency_ms."""
+    started = time.monotonic()
+    if svc.get("protocol") == "tcp":
+        result = check_tcp_port(port, timeout=PORT_PROBE_TIMEOUT)
+    else:
+        result = check_local_port(port, svc.get("path", "/"), timeout=PORT_PROBE_TIMEOUT)
+    result["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return result
+
+
 def get_internal_services() -> list:
     """Check all services internally (container + port)."""
+    started = time.monotonic()
+
+    # One container listing serves every status lookup below
+    index = get_container_index()
+
     # Get dynamic Transmission port based on active VPN
-    transmission_port = get_transmission_port()
+    transmission_port = get_transmission_port(index)
 
-    results = []
+    probes = []
     for svc in SERVICE_CHECKS:
-        name = svc["name"]
-        container = svc["container"]
-        port = svc["port"]
-        path = svc.get("path", "/")
-
         # Use dynamic port for Transmission
-        if name == "Transmission":
-            port = transmission_port
+        port = transmission_port if svc["name"] == "Transmission" else svc["port"]
+        probes.append((svc, port, _probe_pool.submit(probe_service_port, svc, port)))
+
+    wait([future for _, _, future in probes], timeout=max(SERVICES_DEADLINE - (time.monotonic() - started), 0))
 
-        container_status = check_container_status(container)
-        if svc.get("protocol") == "tcp":
-            port_status = check_tcp_port(port)
+    results = []
+    for svc, port, future in probes:
+        if future.done():
+            port_status = future.result()
         else:
-            port_status = check_local_port(port, path)
+            future.cancel()
+            port_status = {
+                "responding": False,
+                "error": "deadline",
+                "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            }
 
         results.append({
-            "name": name,
+            "name": svc["name"],
             "container": {
-                "name": container,
-                **container_status,
+                "name": svc["container"],
+                **check_container_status(svc["container"], index),
             },
             "local_port": {
                 "port": port,
@@ -740,32 +1798,1086 @@ def get_internal_services() -> list:
     return results
 
 
-@app.route("/api/health/ping")
-def ping():
-    """Simple liveness check - no auth required."""
-    return jsonify({"status": "ok", "timestamp": datetime.now(timezone.utc).isoformat()})
+# ============== SINGLE-FLIGHT ==============
+# Concurrent callers of the same collector share one computation, both across
+# threads in a worker and across gunicorn workers (via a lock file plus the
+# shared cache), so two requests never run smartctl or the 1s CPU sample
+# side by side.
+
+SINGLE_FLIGHT_DIR = os.environ.get("SINGLE_FLIGHT_DIR", "/tmp/health-api")
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time and shares its result.
+
+    Within a worker, callers that arrive while a computation is running wait
+    for it. Across workers, an flock on <dir>/<key>.lock elects the leader; it
+    stores the result in the shared cache ("flight:<key>"), and a worker that
+    had to wait for the lock reuses that result instead of recomputing.
+    `max_age` also lets a caller reuse a result another worker finished up to
+    that many seconds before it arrived. `force` skips that reuse (the result
+    is still shared with callers that arrive while it runs).
+    """
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Future
+
+    def run(self, key: str, fn, max_age: float = 0, force: bool = False):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._run_across_workers(key, fn, max_age, force)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _run_across_workers(self, key: str, fn, max_age: float, force: bool):
+        arrived = time.time()
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            fd = os.open(os.path.join(self._directory, f"{key}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            return fn()  # No shared directory - just compute locally
+        try:
+            # Blocks while another worker is computing this key
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if not force:
+                shared = shared_cache.get(f"flight:{key}", max_age=time.time() - arrived + max_age)
+                if shared:
+                    return shared.value
+            result = fn()
+            shared_cache.set(f"flight:{key}", result, max_age)
+            return result
+        finally:
+            os.close(fd)  # Releases the flock
+
+
+single_flight = SingleFlight(SINGLE_FLIGHT_DIR)
+
+
+def shared_collector(name: str, collector, max_age: float = 0):
+    """Wrap a collector so concurrent calls (in any worker) share one run.
+
+    Calling the wrapper with force=True always runs the collector rather than
+    reusing the other worker's recent result.
+    """
+    return lambda force=False: single_flight.run(name, collector, max_age, force)
+
+
+# ============== BACKGROUND SAMPLER ==============
+# Each /api/health section is refreshed on its own interval by a daemon thread,
+# so the route only serializes the latest values instead of blocking on
+# psutil's 1s CPU sample, smartctl, Plex and the Docker API.
+
+# Refresh interval per section, in seconds
+SAMPLE_INTERVALS = {
+    "cpu_percent": 5,
+    "cpu_temps": 5,
+    "load": 10,
+    "memory": 10,
+    "disk": 60,
+    "plex": 15,
+    "storage": 300,
+    "minecraft_memory": 60,
+}
+
+# How long a request waits for a section's first sample right after startup
+SAMPLER_WARMUP_TIMEOUT = 20
+
+# Expensive sections only sampled while someone has asked for them recently;
+# after LAZY_SECTION_IDLE seconds without a request they go dormant until the next one
+LAZY_SECTIONS = {"storage", "minecraft_memory"}
+LAZY_SECTION_IDLE = 900
+
+_EMPTY_SAMPLE = {"value": None, "sampled_at": None}
+
+
+class SectionSampler:
+    """Keeps the latest value of each health section, refreshed in the background.
+
+    Sections in `lazy` are only refreshed while they are being requested (see
+    request()); a dormant one is woken and sampled on its next request.
+    Collectors are called with no arguments, except after refresh(), which
+    calls them with force=True so they skip any cached result.
+    """
+
+    def __init__(self, collectors: dict, intervals: dict, lazy: set = frozenset()):
+        self._collectors = collectors
+        self._intervals = intervals
+        self._lazy = lazy
+        self._cond = threading.Condition()
+        self._samples = {}
+        self._generation = {name: 0 for name in collectors}  # sampling attempts so far
+        self._wanted = {}  # section -> generation a request is waiting for
+        self._requested_at = {}
+        self._dormant = set()
+        self._forced = set()  # sections refresh() asked to re-collect
+        self._wake = {name: threading.Event() for name in collectors}
+        self._listeners = []
+        self._started = False
+
+    def add_listener(self, callback):
+        """Call callback(section, sample) after every new sample."""
+        self._listeners.append(callback)
+
+    def start(self):
+        """Start one sampling thread per section (idempotent)."""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+        for name in self._collectors:
+            thread = threading.Thread(target=self._run, args=(name,), name=f"sampler-{name}")
+            thread.daemon = True
+            thread.start()
+
+    def _idle(self, name: str) -> bool:
+        last_request = self._requested_at.get(name)
+        return name in self._lazy and (
+            last_request is None or time.monotonic() - last_request > LAZY_SECTION_IDLE
+        )
+
+    def _run(self, name: str):
+        collector = self._collectors[name]
+        interval = self._intervals[name]
+        while True:
+            with self._cond:
+                force = name in self._forced
+                self._forced.discard(name)
+                idle = not force and self._idle(name)
+                if idle:
+                    self._dormant.add(name)
+            if idle:
+                # Nobody has asked for this section lately - sleep until someone does
+                self._wake[name].wait()
+                self._wake[name].clear()
+                continue
+
+            started = time.monotonic()
+            sample = None
+            try:
+                sample = {
+                    "value": collector(force=True) if force else collector(),
+                    "sampled_at": datetime.now(timezone.utc).isoformat(),
+                }
+            except Exception as e:
+                # Keep serving the previous sample rather than blanking the section
+                app.logger.error(f"Sampler {name} failed: {e}")
+            with self._cond:
+                if sample is not None:
+                    self._samples[name] = sample
+                self._generation[name] += 1
+                self._cond.notify_all()
+            if sample is not None:
+                for callback in self._listeners:
+                    try:
+                        callback(name, sample)
+                    except Exception as e:
+                        # A broken listener must not stop this section's sampling
+                        app.logger.error(f"Sampler {name} listener failed: {e}")
+
+            elapsed = time.monotonic() - started
+            self._wake[name].wait(max(interval - elapsed, 1))
+            self._wake[name].clear()
+
+    def refresh(self, name: str):
+        """Re-collect a section now, bypassing cached results, instead of waiting for its next interval."""
+        with self._cond:
+            self._forced.add(name)
+        self._wake[name].set()
+
+    def request(self, names: list):
+        """Mark sections as wanted, waking any dormant ones so they sample now."""
+        with self._cond:
+            now = time.monotonic()
+            for name in names:
+                self._requested_at[name] = now
+                if name in self._dormant:
+                    self._dormant.discard(name)
+                    self._wanted[name] = self._generation[name] + 1
+                    self._wake[name].set()
+
+    def get(self, name: str, timeout: float = SAMPLER_WARMUP_TIMEOUT) -> dict:
+        """Return a section's {"value", "sampled_at"}, waiting for a pending sample."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._generation[name] >= self._wanted.get(name, 1), timeout
+            )
+            return self._samples.get(name, _EMPTY_SAMPLE)
+
+    def snapshot(self, timeout: float = SAMPLER_WARMUP_TIMEOUT) -> dict:
+        """Return {section: {"value", "sampled_at"}} without waking dormant sections.
+
+        Waits up to `timeout` for sections that are still warming up.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: all(
+                    self._generation[name] >= 1 or name in self._dormant
+                    for name in self._collectors
+                ),
+                timeout,
+            )
+            return {name: self._samples.get(name, _EMPTY_SAMPLE) for name in self._collectors}
+
+
+# Both workers sample every section; whichever samples first shares its value
+# with the other for up to half the section's interval
+_sampler = SectionSampler(
+    {
+        name: shared_collector(f"section-{name}", timed_collector(name, collector), SAMPLE_INTERVALS[name] / 2)
+        for name, collector in {
+            "cpu_percent": get_cpu_percent,
+            "cpu_temps": get_cpu_temps,
+            "load": get_load_average,
+            "memory": get_memory_info,
+            "disk": get_disk_info,
+            "plex": get_plex_status,
+            "storage": get_storage_status,
+            "minecraft_memory": get_minecraft_memory,
+        }.items()
+    },
+    SAMPLE_INTERVALS,
+    LAZY_SECTIONS,
+)
+_sampler.start()
+
+# /api/health sections, evaluated lazily: only the requested ones are looked up
+HEALTH_SECTIONS = {
+    **{name: (lambda name=name: _sampler.get(name)) for name in SAMPLE_INTERVALS},
+    "speed_test": lambda: {"value": get_speedtest_results(), "sampled_at": None},
+}
+
+
+# ============== CONTAINER RESOURCES ==============
+# CPU, memory, block I/O and network usage of every monitored container,
+# sampled from cgroup and /proc files every CONTAINER_SAMPLE_INTERVAL seconds.
+# Rates come from the deltas between consecutive samples. Each worker samples
+# on its own - a pass over all containers reads a few small files each.
+
+CONTAINER_SAMPLE_INTERVAL = 10
+CONTAINER_SORT_KEYS = {
+    "cpu": lambda c: c["cpu_percent"] or 0,
+    "memory": lambda c: c["memory_bytes"] or 0,
+    "io": lambda c: (c["io_read_bps"] or 0) + (c["io_write_bps"] or 0),
+    "net": lambda c: (c["net_rx_bps"] or 0) + (c["net_tx_bps"] or 0),
+}
+
+
+def monitored_containers() -> set:
+    """Every container in SERVICE_CHECKS and VPN_LOCATIONS."""
+    containers = {svc["container"] for svc in SERVICE_CHECKS}
+    containers.update(config["container"] for config in VPN_LOCATIONS.values())
+    return containers
+
+
+def read_container_net(container_id: str) -> tuple[int, int] | None:
+    """(rx bytes, tx bytes) over a container's interfaces, except loopback.
+
+    Read from /proc/<pid>/net/dev of the first process in its cgroup, which
+    sees the container's network namespace (health-api runs with pid: host).
+    """
+    path = container_cgroup(container_id)
+    if not path:
+        return None
+    proc_root = os.environ.get("HOST_PROC", "/proc")
+    try:
+        with open(os.path.join(path, "cgroup.procs")) as f:
+            pid = f.readline().strip()
+        if not pid:
+            return None
+        rx = tx = 0
+        with open(os.path.join(proc_root, pid, "net", "dev")) as f:
+            for line in f.readlines()[2:]:  # Two header lines
+                interface, _, counters = line.partition(":")
+                if interface.strip() == "lo":
+                    continue
+                fields = counters.split()
+                rx += int(fields[0])
+                tx += int(fields[8])
+        return rx, tx
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ContainerResourceSampler:
+    """Samples monitored containers' counters in the background and turns them into rates."""
+
+    def __init__(self, interval: int):
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._previous = {}  # container name -> (monotonic time, container id, counters)
+        self._view = {"containers": [], "sampled_at": None}
+        self._started = False
+
+    def start(self):
+        """Start the sampling thread (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        thread = threading.Thread(target=self._run, name="container-resources")
+        thread.daemon = True
+        thread.start()
+
+    def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                with timed("collectors", "containers"):
+                    self.sample()
+            except Exception as e:
+                app.logger.error(f"Container resource sampling failed: {e}")
+            time.sleep(max(self._interval - (time.monotonic() - started), 1))
+
+    @staticmethod
+    def _rate(current, previous, elapsed: float) -> float | None:
+        # A counter that went backwards means the container restarted
+        if current is None or previous is None or current < previous:
+            return None
+        return round((current - previous) / elapsed, 1)
+
+    def sample(self):
+        index = get_container_index()
+        if index is None:
+            return
+        now = time.monotonic()
+        containers = []
+        previous = {}
+        for name in sorted(monitored_containers()):
+            record = index.get(name)
+            if not record or record["status"] != "running":
+                continue
+            stats = read_cgroup_stats(record["id"])
+            if not stats:
+                continue
+
+            # Containers sharing another's network (Transmission behind gluetun, or
+            # host networking) would just repeat that namespace's totals
+            network_mode = record["network_mode"]
+            shared_with = None
+            if network_mode == "host":
+                shared_with = "host"
+            elif network_mode.startswith("container:"):
+                owner = find_container_by_id(index, network_mode.replace("container:", ""))
+                shared_with = owner["name"] if owner else "unknown"
+            net = None if shared_with else read_container_net(record["id"])
+
+            counters = {
+                "cpu_usec": stats["cpu_usage_usec"],
+                "io_read": stats["io_read_bytes"],
+                "io_write": stats["io_write_bytes"],
+                "net_rx": net[0] if net else None,
+                "net_tx": net[1] if net else None,
+            }
+            previous[name] = (now, record["id"], counters)
+
+            last = self._previous.get(name)
+            if last and last[1] == record["id"]:
+                elapsed = now - last[0]
+                last_counters = last[2]
+            else:
+                elapsed, last_counters = None, {}
+
+            def rate(key):
+                return self._rate(counters[key], last_counters.get(key), elapsed) if elapsed else None
+
+            cpu_rate = rate("cpu_usec")
+            containers.append({
+                "name": name,
+                "id": record["id"][:12],
+                # Percent of one core, as `docker stats` reports it
+                "cpu_percent": round(cpu_rate / 1e4, 1) if cpu_rate is not None else None,
+                "memory_bytes": stats["memory_used_bytes"],
+                "rss_bytes": stats["memory_anon_bytes"],
+                "memory_limit_bytes": stats["memory_limit_bytes"],
+                "io_read_bps": rate("io_read"),
+                "io_write_bps": rate("io_write"),
+                "net_rx_bps": rate("net_rx"),
+                "net_tx_bps": rate("net_tx"),
+                "network_shared_with": shared_with,
+            })
+
+        with self._lock:
+            self._previous = previous
+            self._view = {"containers": containers, "sampled_at": datetime.now(timezone.utc).isoformat()}
+
+    def top(self, sort: str = "cpu", limit: int | None = None) -> dict:
+        """The latest sample, highest `sort` usage first."""
+        with self._lock:
+            view = self._view
+        containers = sorted(view["containers"], key=CONTAINER_SORT_KEYS[sort], reverse=True)
+        return {
+            "containers": containers[:limit] if limit is not None else containers,
+            "sort": sort,
+            "interval_seconds": self._interval,
+            "sampled_at": view["sampled_at"],
+        }
+
+
+container_resources = ContainerResourceSampler(CONTAINER_SAMPLE_INTERVAL)
+container_resources.start()
+
+
+# ============== TIME SERIES ==============
+# Host metrics recorded every SERIES_RESOLUTION seconds into a fixed-size ring
+# buffer of float64 rows, memory-mapped from SERIES_FILE so history survives
+# container restarts. Each row starts with its slot timestamp, so a row only
+# counts if that timestamp matches the slot being read - no head pointer needed.
+
+SERIES_FILE = os.environ.get("SERIES_FILE", "/series/health-series.bin")
+SERIES_RESOLUTION = 10
+SERIES_RETENTION_HOURS = int(os.environ.get("SERIES_RETENTION_HOURS", "48"))
+SERIES_MAX_POINTS = 2000  # /api/health/series widens `step` to stay under this
+
+_SERIES_MAGIC = b"HSERIES1"
+_SERIES_HEADER_SIZE = 8192
+
+
+def series_columns() -> list:
+    """Column names recorded in the time series."""
+    columns = [
+        "cpu_percent", "load_1m", "load_5m", "load_15m",
+        "memory_percent", "swap_percent", "cpu_temp_package",
+    ]
+    columns += [f"cpu_temp_core_{core_id}" for core_id in coretemp_reader.core_ids()]
+    columns += [f"disk_percent:{name}" for name, _ in MONITORED_DISKS]
+    columns += ["plex_streams", "plex_transcodes"]
+    return columns
+
+
+def series_row(snapshot: dict) -> dict:
+    """Flatten a sampler snapshot into {column: value}."""
+    def value(section):
+        return snapshot.get(section, {}).get("value") or {}
+
+    row = {"cpu_percent": snapshot.get("cpu_percent", {}).get("value")}
+    load = value("load")
+    for key in ("load_1m", "load_5m", "load_15m"):
+        row[key] = load.get(key)
+    memory = value("memory")
+    row["memory_percent"] = memory.get("percent")
+    row["swap_percent"] = memory.get("swap_percent")
+    temps = value("cpu_temps")
+    row["cpu_temp_package"] = (temps.get("package") or {}).get("temp")
+    for core in temps.get("cores", []):
+        row[f"cpu_temp_core_{core['id']}"] = core["temp"]
+    for name, usage in value("disk").items():
+        row[f"disk_percent:{name}"] = usage.get("percent")
+    streams = value("plex").get("streams") or {}
+    row["plex_streams"] = streams.get("total")
+    if streams:
+        row["plex_transcodes"] = streams.get("transcode_hw", 0) + streams.get("transcode_sw", 0)
+    return row
+
+
+class SeriesStore:
+    """Fixed-memory ring buffer of metric rows backed by a memory-mapped file.
+
+    Every gunicorn worker maps the same file; only the worker holding the
+    flock on SERIES_FILE.lock writes, and another takes over if it exits.
+    """
+
+    def __init__(self, path: str, columns: list, resolution: int, slots: int):
+        self._path = path
+        self._columns = columns
+        self._index = {name: i for i, name in enumerate(columns)}
+        self._resolution = resolution
+        self._slots = slots
+        self._width = len(columns) + 1  # slot timestamp + one value per column
+        self._header = json.dumps({
+            "columns": columns, "resolution": resolution, "slots": slots,
+        }).encode()
+        self._size = _SERIES_HEADER_SIZE + slots * self._width * 8
+        self._lock = threading.Lock()
+        self._lock_fd = None
+        self._mm = None
+        self._data = None
+        self._inode = None
+
+    @property
+    def columns(self) -> list:
+        return list(self._columns)
+
+    def _is_writer(self) -> bool:
+        if self._lock_fd is not None:
+            return True
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            fd = os.open(f"{self._path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _create(self):
+        # Build the new file aside and rename it in, so a worker still mapping
+        # the old file never sees it shrink underneath it
+        tmp = f"{self._path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_SERIES_MAGIC + struct.pack("<I", len(self._header)) + self._header)
+            f.truncate(self._size)
+        os.replace(tmp, self._path)
+
+    def _valid(self, size: int) -> bool:
+        if size != self._size:
+            return False
+        with open(self._path, "rb") as f:
+            head = f.read(len(_SERIES_MAGIC) + 4)
+            if head[:len(_SERIES_MAGIC)] != _SERIES_MAGIC:
+                return False
+            (length,) = struct.unpack("<I", head[len(_SERIES_MAGIC):])
+            return f.read(length) == self._header
+
+    def _map(self) -> bool:
+        """Map the file, (re)creating it if this worker is the writer. Lock must be held."""
+        try:
+            st = os.stat(self._path)
+        except FileNotFoundError:
+            if not self._is_writer():
+                return False
+            self._create()
+            st = os.stat(self._path)
+        if self._mm is not None and st.st_ino == self._inode:
+            return True
+
+        if not self._valid(st.st_size):
+            # Missing, resized or different columns - only the writer may reset it
+            if not self._is_writer():
+                return False
+            self._create()
+            st = os.stat(self._path)
+
+        if self._mm is not None:
+            self._data.release()
+            self._mm.close()
+        with open(self._path, "r+b") as f:
+            self._mm = mmap.mmap(f.fileno(), self._size)
+        self._data = memoryview(self._mm)[_SERIES_HEADER_SIZE:].cast("d")
+        self._inode = st.st_ino
+        return True
+
+    def record(self, timestamp: float, values: dict):
+        """Write one row for the slot containing `timestamp` (writer worker only)."""
+        with self._lock:
+            if not self._is_writer() or not self._map():
+                return
+            slot_time = int(timestamp // self._resolution) * self._resolution
+            base = (slot_time // self._resolution % self._slots) * self._width
+            for name, i in self._index.items():
+                value = values.get(name)
+                self._data[base + 1 + i] = float(value) if value is not None else math.nan
+            # Timestamp last: readers treat the row as valid once it matches
+            self._data[base] = float(slot_time)
+
+    def query(self, columns: list, start: float, end: float, step: int) -> dict | None:
+        """Downsample columns over [start, end] into `step`-second buckets.
+
+        Returns {column: [[bucket_start, avg, min, max], ...]}, or None if no
+        series file is available yet. Empty buckets have null values.
+        """
+        first = int(math.ceil(start / self._resolution)) * self._resolution
+        first = max(first, int(end // self._resolution) * self._resolution
+                    - (self._slots - 1) * self._resolution)
+        buckets = max(int((end - first) // step) + 1, 0)
+        stats = {name: [[0.0, 0, math.inf, -math.inf] for _ in range(buckets)] for name in columns}
+
+        with self._lock:
+            if not self._map():
+                return None
+            for slot_time in range(first, int(end) + 1, self._resolution):
+                base = (slot_time // self._resolution % self._slots) * self._width
+                if self._data[base] != slot_time:
+                    continue
+                bucket = (slot_time - first) // step
+                for name in columns:
+                    value = self._data[base + 1 + self._index[name]]
+                    if math.isnan(value):
+                        continue
+                    acc = stats[name][bucket]
+                    acc[0] += value
+                    acc[1] += 1
+                    acc[2] = min(acc[2], value)
+                    acc[3] = max(acc[3], value)
+
+        return {
+            name: [
+                [first + b * step, round(total / count, 3), min_v, max_v] if count else
+                [first + b * step, None, None, None]
+                for b, (total, count, min_v, max_v) in enumerate(stats[name])
+            ]
+            for name in columns
+        }
+
+
+def _run_series_recorder():
+    """Record a series row every SERIES_RESOLUTION seconds from the sampler's latest values."""
+    while True:
+        time.sleep(SERIES_RESOLUTION - time.time() % SERIES_RESOLUTION)
+        try:
+            series_store.record(time.time(), series_row(_sampler.snapshot(timeout=0)))
+        except Exception as e:
+            app.logger.error(f"Series recorder failed: {e}")
+
+
+series_store = SeriesStore(
+    SERIES_FILE,
+    series_columns(),
+    SERIES_RESOLUTION,
+    SERIES_RETENTION_HOURS * 3600 // SERIES_RESOLUTION,
+)
+_series_thread = threading.Thread(target=_run_series_recorder, name="series-recorder")
+_series_thread.daemon = True
+_series_thread.start()
+
+
+def _parse_series_time(value: str | None, default: float, now: float) -> float:
+    """Parse a series bound: unix seconds, negative seconds relative to now, or "now".
+
+    Raises ValueError for anything that isn't a finite number.
+    """
+    if value in (None, "", "now"):
+        return default
+    seconds = float(value)
+    if not math.isfinite(seconds):
+        raise ValueError(f"not a finite number: {value}")
+    return now + seconds if seconds <= 0 else seconds
+
+
+# ============== LIVE STREAM ==============
+# One shared producer turns sampler ticks and container events into small
+# delta events and fans them out to every /api/health/stream subscriber.
+# Each subscriber has a bounded queue; one that falls behind is evicted
+# (its EventSource reconnects and gets a fresh snapshot).
+
+# Sections pushed on every sample; the rest are pushed only when they change
+STREAM_TICK_SECTIONS = {"cpu_percent", "cpu_temps", "load", "memory"}
+# Per-collection timestamps (storage.timestamp, each drive's SMART sampled_at),
+# ignored when deciding whether a section changed
+STREAM_VOLATILE_FIELDS = {"timestamp", "sampled_at"}
+STREAM_QUEUE_SIZE = 64
+STREAM_MAX_CLIENTS = 8  # per worker - each open stream holds a gunicorn thread
+STREAM_KEEPALIVE = 15
+
+
+class StreamSubscriber:
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.evicted = False
+
+
+class HealthEventBroker:
+    """Fans out health delta events from one producer to many subscribers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._last = {}  # section -> last published JSON, for change detection
+
+    def subscribe(self) -> StreamSubscriber | None:
+        with self._lock:
+            if len(self._subscribers) >= STREAM_MAX_CLIENTS:
+                return None
+            subscriber = StreamSubscriber()
+            self._subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber: StreamSubscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event: str, data: dict):
+        # Serialize once, however many subscribers there are
+        message = f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+            except queue.Full:
+                subscriber.evicted = True
+                self.unsubscribe(subscriber)
+
+    @staticmethod
+    def _stable(value):
+        """The value without STREAM_VOLATILE_FIELDS, at any depth."""
+        if isinstance(value, dict):
+            return {
+                key: HealthEventBroker._stable(item) for key, item in value.items()
+                if key not in STREAM_VOLATILE_FIELDS
+            }
+        if isinstance(value, list):
+            return [HealthEventBroker._stable(item) for item in value]
+        return value
+
+    def on_sample(self, section: str, sample: dict):
+        encoded = json.dumps(self._stable(sample["value"]), sort_keys=True)
+        if section not in STREAM_TICK_SECTIONS and self._last.get(section) == encoded:
+            return
+        self._last[section] = encoded
+        self.publish("section", {"section": section, **sample})
+
+    def on_container(self, record: dict):
+        self.publish("container", record)
+
+
+stream_broker = HealthEventBroker()
+_sampler.add_listener(stream_broker.on_sample)
+container_table.add_listener(stream_broker.on_container)
+
+
+def _stream_events(subscriber: StreamSubscriber):
+    """SSE generator: a full snapshot first, then deltas until the client leaves."""
+    try:
+        # An open stream counts as demand, so lazy sections keep sampling
+        _sampler.request(list(LAZY_SECTIONS))
+        snapshot = _sampler.snapshot(timeout=0)
+        yield f"event: snapshot\ndata: {json.dumps(snapshot, separators=(',', ':'))}\n\n"
+        while not subscriber.evicted:
+            _sampler.request(list(LAZY_SECTIONS))
+            try:
+                yield subscriber.queue.get(timeout=STREAM_KEEPALIVE)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+        yield "event: evicted\ndata: {}\n\n"
+    finally:
+        stream_broker.unsubscribe(subscriber)
+
+
+def stream_response():
+    """Open an SSE stream, or 503 if this worker is at STREAM_MAX_CLIENTS."""
+    subscriber = stream_broker.subscribe()
+    if subscriber is None:
+        return jsonify({"error": "Too many open streams"}), 503
+    return app.response_class(
+        _stream_events(subscriber),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ============== METRICS EXPOSITION ==============
+# /metrics renders the collectors' cached state as OpenMetrics text. It never
+# runs smartctl, probes ports or calls the Docker API itself, so a 15s scrape
+# interval costs next to nothing.
+
+METRICS_PREFIX = "home"
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class MetricsWriter:
+    """Collects samples grouped by metric family and renders OpenMetrics text."""
+
+    def __init__(self):
+        self._families = {}
+
+    def add(self, name: str, kind: str, help_text: str, value, **labels):
+        """Add a sample; None values are skipped. Counter samples get a _total suffix."""
+        name = f"{METRICS_PREFIX}_{name}"
+        family = self._families.setdefault(name, {"kind": kind, "help": help_text, "samples": []})
+        if value is None:
+            return
+        if isinstance(value, bool):
+            value = int(value)
+        family["samples"].append((labels, value))
+
+    def render(self, openmetrics: bool = True) -> str:
+        """OpenMetrics text, or Prometheus text 0.0.4 when openmetrics=False.
+
+        OpenMetrics declares a counter family by its bare name; 0.0.4 has no
+        families, so there TYPE/HELP name the _total series itself.
+        """
+        lines = []
+        for name, family in self._families.items():
+            if not family["samples"]:
+                continue
+            suffix = "_total" if family["kind"] == "counter" else ""
+            declared = name if openmetrics else f"{name}{suffix}"
+            lines.append(f"# TYPE {declared} {family['kind']}")
+            lines.append(f"# HELP {declared} {family['help']}")
+            for labels, value in family["samples"]:
+                label_str = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{suffix}{{{label_str}}} {value}" if label_str else f"{name}{suffix} {value}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def collect_metrics(openmetrics: bool = True) -> str:
+    """Render all cached collector state as OpenMetrics (or Prometheus 0.0.4) text."""
+    m = MetricsWriter()
+    # A scrape counts as demand for storage, so the RAID/SMART gauges keep updating
+    _sampler.request(["storage"])
+    samples = _sampler.snapshot(timeout=0)
+    snapshot = {name: sample["value"] for name, sample in samples.items()}
+
+    now = datetime.now(timezone.utc)
+    for name, sample in samples.items():
+        if sample["sampled_at"]:
+            age = (now - datetime.fromisoformat(sample["sampled_at"])).total_seconds()
+            m.add("section_age_seconds", "gauge", "Seconds since the section was last sampled",
+                  round(age, 1), section=name)
+
+    m.add("cpu_usage_percent", "gauge", "CPU usage", snapshot.get("cpu_percent"))
+    temps = snapshot.get("cpu_temps") or {}
+    if temps.get("package"):
+        m.add("cpu_temperature_celsius", "gauge", "CPU temperature", temps["package"]["temp"], sensor="package")
+    for core in temps.get("cores", []):
+        m.add("cpu_temperature_celsius", "gauge", "CPU temperature", core["temp"], sensor=f"core{core['id']}")
+
+    load = snapshot.get("load") or {}
+    for period in ("1m", "5m", "15m"):
+        m.add("load_average", "gauge", "System load average", load.get(f"load_{period}"), period=period)
+
+    memory = snapshot.get("memory") or {}
+    m.add("memory_used_percent", "gauge", "RAM in use", memory.get("percent"))
+    m.add("swap_used_percent", "gauge", "Swap in use", memory.get("swap_percent"))
+
+    for mount, usage in (snapshot.get("disk") or {}).items():
+        m.add("disk_used_percent", "gauge", "Filesystem usage", usage["percent"], mount=mount)
+        m.add("disk_free_bytes", "gauge", "Filesystem free space", int(usage["free_gb"] * 1024**3), mount=mount)
+
+    storage = snapshot.get("storage") or {}
+    for array in storage.get("arrays", []):
+        labels = {"array": array["name"], "device": array["device"]}
+        m.add("storage_healthy", "gauge", "1 if the array/drive status is healthy",
+              array["status"] == "healthy", **labels)
+        m.add("storage_status", "gauge", "Array/drive status (value is always 1)", 1,
+              status=array["status"], **labels)
+        m.add("storage_free_bytes", "gauge", "Array/drive free space",
+              int(array["free_gb"] * 1024**3) if "free_gb" in array else None, **labels)
+        if array["type"].startswith("raid"):
+            m.add("raid_active_devices", "gauge", "Active RAID member devices", array["active_devices"], **labels)
+            m.add("raid_total_devices", "gauge", "Configured RAID member devices", array["total_devices"], **labels)
+            m.add("raid_rebuild_progress_percent", "gauge", "RAID rebuild/recovery progress",
+                  array.get("rebuild_progress") or 0, **labels)
+
+    for drive in storage.get("drives", []):
+        device = drive["device"]
+        passed = {"PASSED": 1, "FAILED": 0}.get(drive.get("smart_status"))
+        m.add("smart_passed", "gauge", "1 if SMART self-assessment passed, 0 if failed", passed, device=device)
+        m.add("smart_temperature_celsius", "gauge", "Drive temperature", drive.get("temperature"), device=device)
+        m.add("smart_power_on_hours", "counter", "Drive power-on hours", drive.get("power_on_hours"), device=device)
+        for attribute, value in drive.get("attributes", {}).items():
+            m.add("smart_attribute", "gauge", "SMART attribute raw value", value, device=device, attribute=attribute)
+        m.add("smart_standby", "gauge", "1 if the drive was in standby at the last probe",
+              drive.get("power_state") in ("standby", "sleep"), device=device)
+        m.add("smart_stale", "gauge", "1 if the last SMART probe failed and cached data is served",
+              drive.get("stale", False), device=device)
+
+    plex = snapshot.get("plex") or {}
+    m.add("plex_reachable", "gauge", "1 if Plex answered", plex.get("reachable", False))
+    m.add("plex_libraries", "gauge", "Plex library sections", plex.get("library_count"))
+    for decision, count in (plex.get("streams") or {}).items():
+        if decision != "total":
+            m.add("plex_streams", "gauge", "Active Plex streams", count, decision=decision)
+
+    if container_table.synced:
+        containers = container_table.snapshot()
+        for svc in SERVICE_CHECKS:
+            record = containers.get(svc["container"])
+            labels = {"service": svc["name"], "container": svc["container"]}
+            m.add("container_running", "gauge", "1 if the container is running",
+                  bool(record and record["status"] == "running"), **labels)
+            if record and record["health"]:
+                m.add("container_healthy", "gauge", "1 if the container health check passes",
+                      record["health"] == "healthy", **labels)
+
+    speedtest = get_speedtest_results()
+    home = speedtest.get("home") or {}
+    m.add("internet_download_mbps", "gauge", "Home connection download speed", home.get("download"))
+    m.add("internet_upload_mbps", "gauge", "Home connection upload speed", home.get("upload"))
+    for location, vpn in (speedtest.get("vpn") or {}).items():
+        m.add("vpn_download_mbps", "gauge", "VPN download speed", vpn.get("download"), location=location.lower())
+        m.add("vpn_healthy", "gauge", "1 if the VPN speed test passed",
+              vpn.get("status") == "healthy", location=location.lower())
+        m.add("vpn_active", "gauge", "1 if Transmission routes through this VPN",
+              bool(vpn.get("active")), location=location.lower())
+
+    # Per gunicorn worker: scrapes alternate between workers, so without the
+    # worker label each switch to the smaller counter would look like a reset
+    worker = os.getpid()
+    for pool, stats in get_http_pool_stats()["pools"].items():
+        m.add("http_requests", "counter", "Outbound HTTP requests", stats["requests"], pool=pool, worker=worker)
+        m.add("http_connections", "counter", "Outbound HTTP connections opened",
+              stats["new_connections"], pool=pool, worker=worker)
+
+    return m.render(openmetrics)
+
+
+# ============== RESPONSE ENCODING ==============
+# Every buffered 200 response gets a strong ETag (so If-None-Match can answer
+# 304) and is gzip-compressed when the client accepts it - even for callers
+# that bypass nginx. Streams (SSE) are passed through untouched.
+
+GZIP_LEVEL = 6
+GZIP_MIN_SIZE = 1024  # smaller bodies aren't worth the CPU or the header
+
+RESPONSE_FORMATS = ("json", "compact")
+
+
+def compact_value(value):
+    """Drop null and empty values at any depth (absent means null/empty)."""
+    if isinstance(value, dict):
+        return {
+            key: compact_value(item)
+            for key, item in value.items()
+            if item is not None and item != [] and item != {}
+        }
+    if isinstance(value, list):
+        return [compact_value(item) for item in value]
+    return value
+
+
+def compact_health(doc: dict) -> dict:
+    """The ?format=compact form of an /api/health document.
+
+    Drops fields that can be derived from others or that change on every
+    request (so unchanged samples keep the same ETag): the request timestamp,
+    compute_ms and wait_ms, the storage section's own timestamp (see sampled_at.storage),
+    Plex library titles/count (see library_details), and null/empty values.
+    """
+    doc = {key: value for key, value in doc.items() if key not in ("timestamp", "compute_ms", "wait_ms")}
+    if isinstance(doc.get("storage"), dict):
+        doc["storage"] = {key: value for key, value in doc["storage"].items() if key != "timestamp"}
+    if isinstance(doc.get("plex"), dict):
+        doc["plex"] = {
+            key: value for key, value in doc["plex"].items() if key not in ("libraries", "library_count")
+        }
+    return compact_value(doc)
+
+
+@app.after_request
+def encode_response(response):
+    """Add a strong ETag, answer If-None-Match with 304, and gzip if accepted."""
+    if (
+        response.status_code != 200
+        or response.is_streamed
+        or response.direct_passthrough
+        or response.mimetype == "text/event-stream"
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    body = response.get_data()
+    gzipped = len(body) >= GZIP_MIN_SIZE and request.accept_encodings.quality("gzip") > 0
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    if gzipped:
+        etag += "-gzip"  # a strong ETag identifies the exact bytes, so it differs per encoding
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+
+    response.make_conditional(request)
+    if response.status_code == 304:
+        return response
+    if gzipped:
+        response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+@app.route("/api/health/ping")
+def ping():
+    """Simple liveness check - no auth required."""
+    return jsonify({"status": "ok", "timestamp": datetime.now(timezone.utc).isoformat()})
+
+
+@app.route("/api/health/minecraft")
+def minecraft_health():
+    """Minecraft container liveness — used by status dashboard."""
+    index = get_container_index()
+    if index is None:
+        return jsonify({"status": "down", "container": "docker_unavailable"}), 503
+    record = index.get("minecraft")
+    if not record:
+        return jsonify({"status": "down", "container": "not_found"}), 503
+    if record["status"] == "running":
+        return jsonify({"status": "ok", "container": "running"}), 200
+    return jsonify({"status": "down", "container": record["status"]}), 503
+
+
+@app.route("/api/health/debug/http")
+@require_api_key
+def debug_http():
+    """Connection reuse stats for outbound HTTP (pool hits vs new connections)."""
+    return jsonify({
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        **get_http_pool_stats(),
+    })
+
+
+@app.route("/api/health/debug/cache")
+@require_api_key
+def debug_cache():
+    """Shared cache entries with per-key hit/miss counters (for tuning TTLs)."""
+    return jsonify({
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        **shared_cache.stats(),
+    })
+
+
+@app.route("/api/health/debug/timings")
+@require_api_key
+def debug_timings():
+    """Rolling p50/p95/p99 per collector, external call and route (this worker only)."""
+    return jsonify({
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "worker_pid": os.getpid(),
+        "window": TIMING_WINDOW,
+        "slow_request_ms": SLOW_REQUEST_MS,
+        **latency.stats(),
+    })
 
 
-@app.route("/api/health/minecraft")
-def minecraft_health():
-    """Minecraft container liveness — used by status dashboard."""
-    client = get_docker_client()
-    if not client:
-        return jsonify({"status": "down", "container": "docker_unavailable"}), 503
-    try:
-        container = client.containers.get("minecraft")
-        if container.status == "running":
-            return jsonify({"status": "ok", "container": "running"}), 200
-        return jsonify({"status": "down", "container": container.status}), 503
-    except docker.errors.NotFound:
-        return jsonify({"status": "down", "container": "not_found"}), 503
+@app.route("/api/health/containers")
+@require_api_key
+def containers_top():
+    """Per-container CPU, memory, block I/O and network rates, busiest first.
+
+    ?sort=cpu|memory|io|net (default cpu), ?limit=N for the top N only.
+    """
+    sort = request.args.get("sort", "cpu")
+    if sort not in CONTAINER_SORT_KEYS:
+        return jsonify({"error": f"Unknown sort: {sort}", "sorts": list(CONTAINER_SORT_KEYS)}), 400
+    limit = request.args.get("limit")
+    if limit is not None:
+        if not limit.isdigit() or int(limit) < 1:
+            return jsonify({"error": f"limit must be a positive integer, got {limit!r}"}), 400
+        limit = int(limit)
+    return jsonify({
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        **container_resources.top(sort, limit),
+    })
 
 
 @app.route("/api/health/public-ip")
 @require_api_key
 def public_ip():
     """Get public IP address - for DNS failback."""
-    result = get_public_ip()
+    result = dict(single_flight.run("public-ip", get_public_ip))
     result["timestamp"] = datetime.now(timezone.utc).isoformat()
     return jsonify(result)
 
@@ -776,43 +2888,226 @@ def services():
     """Check internal service status (container + local port)."""
     return jsonify({
         "timestamp": datetime.now(timezone.utc).isoformat(),
-        "services": get_internal_services(),
+        "services": single_flight.run("services", get_internal_services),
+    })
+
+
+@app.route("/api/health/series")
+@require_api_key
+def series():
+    """Recorded host metrics, downsampled server-side.
+
+    Query: metric (comma-separated column names), from/to (unix seconds,
+    negative = relative to now; default last hour), step (bucket seconds).
+    """
+    metrics = [m for m in request.args.get("metric", "").split(",") if m]
+    unknown = [m for m in metrics if m not in series_store.columns]
+    if not metrics or unknown:
+        return jsonify({
+            "error": f"Unknown metric: {', '.join(unknown)}" if unknown else "metric is required",
+            "metrics": series_store.columns,
+        }), 400
+
+    now = time.time()
+    try:
+        start = _parse_series_time(request.args.get("from"), now - 3600, now)
+        end = min(_parse_series_time(request.args.get("to"), now, now), now)
+        step = int(request.args.get("step", SERIES_RESOLUTION))
+    except ValueError:
+        return jsonify({"error": "from, to and step must be numbers"}), 400
+    # Nothing is kept past the retention window - don't widen the buckets for it
+    start = max(start, now - SERIES_RETENTION_HOURS * 3600)
+    if end <= start:
+        return jsonify({"error": "from must be before to"}), 400
+
+    # Round step up to the resolution and widen it to cap the number of points
+    step = max(step, SERIES_RESOLUTION, math.ceil((end - start) / SERIES_MAX_POINTS))
+    step = math.ceil(step / SERIES_RESOLUTION) * SERIES_RESOLUTION
+
+    points = series_store.query(metrics, start, end, step)
+    if points is None:
+        return jsonify({"error": "Time series not available yet"}), 503
+
+    return jsonify({
+        "from": start,
+        "to": end,
+        "step": step,
+        "resolution": SERIES_RESOLUTION,
+        "fields": ["timestamp", "avg", "min", "max"],
+        "series": points,
     })
 
 
+@app.route("/api/health/stream")
+@require_api_key
+def health_stream():
+    """Server-Sent Events stream of health deltas (sections and container state)."""
+    return stream_response()
+
+
 @app.route("/api/health")
 @require_api_key
 def health():
-    """Full health status endpoint."""
+    """Full health status endpoint - serves the background sampler's latest snapshot.
+
+    ?sections=cpu_percent,memory,... returns (and keeps sampling) only those
+    sections. compute_ms reports how long each section's last collection
+    took; wait_ms how long this request waited for it.
+    ?format=compact drops derivable and per-request fields (see compact_health).
+    """
+    names, compact, error = parse_health_query()
+    if error:
+        return error
+
+    result = build_health(names)
+    for name in names:
+        # Time spent waiting for the section here, then what its last collection took
+        add_server_timing(name, result["wait_ms"][name], "wait")
+        add_server_timing(f"{name}-collect", latency.last("collectors", name), "last collection")
+    return jsonify(compact_health(result) if compact else result)
+
+
+def parse_health_query():
+    """Read ?sections= and ?format= as (names, compact, error response or None)."""
+    sections = request.args.get("sections")
+    names = [name for name in sections.split(",") if name] if sections else list(HEALTH_SECTIONS)
+    unknown = [name for name in names if name not in HEALTH_SECTIONS]
+    if unknown:
+        return names, False, (jsonify({
+            "error": f"Unknown section: {', '.join(unknown)}",
+            "sections": list(HEALTH_SECTIONS),
+        }), 400)
+
+    response_format = request.args.get("format", "json")
+    if response_format not in RESPONSE_FORMATS:
+        return names, False, (jsonify({
+            "error": f"Unknown format: {response_format}",
+            "formats": list(RESPONSE_FORMATS),
+        }), 400)
+    return names, response_format == "compact", None
+
+
+def build_health(names: list, compact: bool = False) -> dict:
+    """The /api/health document for the given sections (see compact_health)."""
+    # Wake any dormant sections up front so their first samples run in parallel
+    _sampler.request([name for name in names if name in SAMPLE_INTERVALS])
+
+    result = {"timestamp": datetime.now(timezone.utc).isoformat()}
+    sampled_at = {}
+    wait_ms = {}
+    compute_ms = {}
+    for name in names:
+        started = time.monotonic()
+        sample = HEALTH_SECTIONS[name]()
+        wait_ms[name] = round((time.monotonic() - started) * 1000, 2)
+        result[name] = sample["value"]
+        if name in SAMPLE_INTERVALS:
+            sampled_at[name] = sample["sampled_at"]
+            last = latency.last("collectors", name)
+            compute_ms[name] = round(last, 2) if last is not None else None
+        else:
+            compute_ms[name] = wait_ms[name]  # Computed inline, not sampled
+    result["sampled_at"] = sampled_at
+    result["compute_ms"] = compute_ms
+    result["wait_ms"] = wait_ms
+    return compact_health(result) if compact else result
+
+
+# Parts of /api/health/bundle. Each is computed on _bundle_pool; a part still
+# running at the deadline is reported as "timeout" rather than holding the rest.
+BUNDLE_DEADLINE = SERVICES_DEADLINE + 5
+
+_bundle_pool = ThreadPoolExecutor(max_workers=6, thread_name_prefix="bundle")
+
+
+def _bundle_part(fn) -> dict:
+    started = time.monotonic()
+    try:
+        data = fn()
+        status = "error" if isinstance(data, dict) and "error" in data else "ok"
+        part = {"status": status, "data": data}
+    except Exception as e:
+        app.logger.error(f"Bundle part failed: {e}")
+        part = {"status": "error", "error": str(e)}
+    part["duration_ms"] = round((time.monotonic() - started) * 1000, 2)
+    return part
+
+
+@app.route("/api/health/bundle")
+@require_api_key
+def health_bundle():
+    """/api/health, /api/health/services and /api/health/public-ip in one response.
+
+    The parts are computed concurrently; each reports its own status and
+    duration_ms. ?sections= and ?format= apply to the health part.
+    """
+    names, compact, error = parse_health_query()
+    if error:
+        return error
+
+    started = time.monotonic()
+    futures = {
+        "health": _bundle_pool.submit(_bundle_part, lambda: build_health(names, compact)),
+        "services": _bundle_pool.submit(
+            _bundle_part, lambda: {"services": single_flight.run("services", get_internal_services)}
+        ),
+        "public_ip": _bundle_pool.submit(_bundle_part, lambda: single_flight.run("public-ip", get_public_ip)),
+    }
+    wait(futures.values(), timeout=BUNDLE_DEADLINE)
+
+    parts = {}
+    for name, future in futures.items():
+        if future.done():
+            parts[name] = future.result()
+        else:
+            parts[name] = {"status": "timeout", "duration_ms": round(BUNDLE_DEADLINE * 1000, 2)}
+        add_server_timing(name, parts[name]["duration_ms"], parts[name]["status"])
     return jsonify({
         "timestamp": datetime.now(timezone.utc).isoformat(),
-        "cpu_percent": get_cpu_percent(),
-        "cpu_temps": get_cpu_temps(),
-        "load": get_load_average(),
-        "memory": get_memory_info(),
-        "disk": get_disk_info(),
-        "plex": get_plex_status(),
-        "speed_test": get_speedtest_results(),
-        "storage": get_storage_status(),
-        "minecraft_memory": get_minecraft_memory(),
+        "duration_ms": round((time.monotonic() - started) * 1000, 2),
+        "parts": parts,
     })
 
 
+@app.route("/metrics")
+@require_api_key
+def metrics():
+    """OpenMetrics/Prometheus exposition of cached collector state."""
+    openmetrics = "application/openmetrics-text" in request.headers.get("Accept", "")
+    if openmetrics:
+        content_type = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+    else:
+        content_type = "text/plain; version=0.0.4; charset=utf-8"
+    return app.response_class(collect_metrics(openmetrics), content_type=content_type)
+
+
 @app.route("/")
 def root():
     """Root endpoint - list available endpoints."""
     return jsonify({
         "service": "health-api",
         "endpoints": {
-            "/api/health": "Full health status (requires API key)",
+            "/api/health": "Full health status - optional ?sections=cpu_percent,memory,... and ?format=compact (requires API key)",
+            "/api/health/bundle": "Health, services and public IP in one response (requires API key)",
             "/api/health/ping": "Simple liveness check",
             "/api/health/minecraft": "Minecraft container liveness",
             "/api/health/public-ip": "Public IP address (requires API key)",
             "/api/health/services": "Internal service status - container + local port (requires API key)",
+            "/api/health/containers": "Per-container CPU/memory/IO/network rates - ?sort=cpu|memory|io|net&limit= (requires API key)",
+            "/api/health/series": "Recorded host metrics - ?metric=&from=&to=&step= (requires API key)",
+            "/api/health/stream": "Server-Sent Events stream of health deltas (requires API key)",
+            "/api/health/debug/http": "Outbound HTTP connection pool reuse stats (requires API key)",
+            "/api/health/debug/cache": "Shared cache entries and per-key hit/miss counters (requires API key)",
+            "/api/health/debug/timings": "Rolling p50/p95/p99 per collector and route (requires API key)",
+            "/api/health/vpn/jobs/<id>": "VPN switch job status and step timeline; /stream for SSE progress (requires API key)",
+            "/metrics": "OpenMetrics/Prometheus exposition (requires API key)",
             "/api/admin/whoami": "Check authentication status (OAuth protected)",
+            "/api/admin/health/stream": "Server-Sent Events stream of health deltas (OAuth protected)",
             "/api/admin/vpn/status": "Get VPN location status (OAuth protected)",
-            "/api/admin/vpn/switch": "Switch VPN location (OAuth protected, POST)",
-            "/api/admin/container/restart": "Restart a container (OAuth protected, POST)",
+            "/api/admin/vpn/switch": "Switch VPN location - returns a job ID (OAuth protected, POST)",
+            "/api/admin/container/restart": "Queue a container restart - returns an operation ID (OAuth protected, POST)",
+            "/api/admin/container/ops/<id>": "Container operation status, timestamps and exit status (OAuth protected)",
+            "/api/admin/storage/smart/refresh": "Force a SMART re-read, waking sleeping drives (OAuth protected, POST)",
             "/api/admin/server/reboot": "Reboot the server (OAuth protected, POST)",
         }
     })
@@ -850,36 +3145,23 @@ def admin_whoami():
     })
 
 
+@app.route("/api/admin/health/stream")
+@require_admin
+def admin_health_stream():
+    """Same SSE stream as /api/health/stream, for browsers (OAuth cookie instead of API key)."""
+    return stream_response()
+
+
 @app.route("/api/admin/vpn/status")
 @require_admin
 def admin_vpn_status():
     """Get current VPN status - which location is active and health of all locations."""
-    client = get_docker_client()
-    if not client:
+    index = get_container_index()
+    if index is None:
         return jsonify({"error": "Docker unavailable"}), 500
 
     # Determine which gluetun container transmission is using
-    active_location = None
-    try:
-        transmission = client.containers.get("transmission")
-        network_mode = transmission.attrs.get("HostConfig", {}).get("NetworkMode", "")
-
-        # Network mode is "container:<id>" - get the container name
-        if network_mode.startswith("container:"):
-            container_id = network_mode.replace("container:", "")
-            try:
-                vpn_container = client.containers.get(container_id)
-                vpn_name = vpn_container.name
-                # Map container name to location
-                for loc, config in VPN_LOCATIONS.items():
-                    if config["container"] == vpn_name:
-                        active_location = loc
-                        break
-            except docker.errors.NotFound:
-                # VPN container was removed/recreated
-                active_location = "unknown"
-    except docker.errors.NotFound:
-        pass  # Transmission not running
+    active_location = get_active_vpn_location(index)
 
     # Get health status of all VPN containers
     # Note: gluetun's Docker health check is unreliable, so we check:
@@ -891,10 +3173,10 @@ def admin_vpn_status():
     locations = []
     for loc, config in VPN_LOCATIONS.items():
         container_name = config["container"]
-        try:
-            container = client.containers.get(container_name)
-            status = container.status
-            health = container.attrs.get("State", {}).get("Health", {}).get("Status")
+        record = index.get(container_name)
+        if record:
+            status = record["status"]
+            health = record["health"]
             is_running = status == "running"
 
             # Check speed test data for actual VPN health
@@ -906,7 +3188,7 @@ def admin_vpn_status():
 
             # Healthy if running AND (speedtest says healthy OR no speedtest data)
             is_healthy = is_running and speedtest_status in ("healthy", None)
-        except docker.errors.NotFound:
+        else:
             status = "not_found"
             health = None
             is_running = False
@@ -934,15 +3216,9 @@ def admin_vpn_status():
 def get_gluetun_forwarded_port(container_name: str) -> int | None:
     """Read the forwarded port from a running gluetun container."""
     try:
-        result = subprocess.run(
-            ["docker", "exec", container_name, "cat", "/tmp/gluetun/forwarded_port"],
-            capture_output=True, text=True, timeout=10
-        )
-        if result.returncode == 0:
-            return int(result.stdout.strip())
+        return int(docker_read_file(container_name, "/tmp/gluetun/forwarded_port").strip())
     except Exception:
-        pass
-    return None
+        return None
 
 
 def set_transmission_peer_port(port: int) -> dict:
@@ -971,7 +3247,7 @@ def update_arr_download_client_port(app_name: str, api_url: str, api_key: str, n
 
     try:
         # Get current download clients
-        resp = requests.get(f"{api_url}/api/v3/downloadclient", headers=headers, timeout=10)
+        resp = http_session.get(f"{api_url}/api/v3/downloadclient", headers=headers, timeout=10)
         resp.raise_for_status()
         clients = resp.json()
 
@@ -993,7 +3269,7 @@ def update_arr_download_client_port(app_name: str, api_url: str, api_key: str, n
 
         # PUT the updated client
         client_id = transmission_client["id"]
-        resp = requests.put(
+        resp = http_session.put(
             f"{api_url}/api/v3/downloadclient/{client_id}",
             headers=headers,
             json=transmission_client,
@@ -1014,26 +3290,432 @@ def update_arr_download_client_port(app_name: str, api_url: str, api_key: str, n
         return {"success": False, "error": f"{app_name} API error: {str(e)}"}
 
 
-def _do_vpn_switch(target: str, triggered_by: str) -> tuple[dict, int]:
-    """Core VPN switch logic. Returns (response_dict, status_code)."""
-    target = target.lower()
+# ============== VPN SWITCH JOBS ==============
+# A switch takes up to ~2 minutes, far past gunicorn's 30s timeout, so it runs
+# as a background job and the request returns a job ID straight away. Jobs
+# live in SQLite under /tmp so either worker can report on (or deduplicate
+# against) a job the other one accepted, and an flock makes switches run one
+# at a time across both workers.
+
+VPN_JOBS_FILE = os.environ.get("VPN_JOBS_FILE", "/tmp/health-api/vpn-jobs.db")
+VPN_SWITCH_LOCK = "/tmp/health-api/vpn-switch.lock"
+VPN_JOBS_KEPT = 50  # finished jobs older than the newest 50 are pruned
+VPN_JOB_POLL = 0.5  # seconds between job reads on a progress stream
+VPN_JOB_ACTIVE = ("queued", "running")
+VPN_JOB_STREAM_MAX = 4  # per worker - each open progress stream holds a gunicorn thread
+VPN_JOB_STREAM_TIMEOUT = 600  # a stream closes after this long even if the job is still active
+
+
+class VpnSwitchError(Exception):
+    """A switch step failed; `details` are merged into the job's error result."""
+
+    def __init__(self, message: str, **details):
+        super().__init__(message)
+        self.details = details
+
+
+class VpnJobStore:
+    """VPN switch jobs (status, step timeline, result) shared by both workers."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()  # one connection per thread
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, target TEXT NOT NULL, triggered_by TEXT NOT NULL,"
+                " status TEXT NOT NULL, worker_pid INTEGER NOT NULL, created_at TEXT NOT NULL,"
+                " started_at TEXT, finished_at TEXT, steps TEXT NOT NULL DEFAULT '[]', result TEXT,"
+                " version INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _record(self, row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job["steps"] = json.loads(job["steps"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(self, target: str, triggered_by: str) -> tuple[dict, bool]:
+        """Create a queued job, or return the active job for the same target.
+
+        Returns (job, created). The check and insert share one write
+        transaction, so two workers can't both create a job for one target.
+        """
+        self._fail_orphans()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT * FROM jobs WHERE target = ? AND status IN {VPN_JOB_ACTIVE} ORDER BY created_at",
+                (target,),
+            ).fetchone()
+            if row is not None:
+                conn.execute("COMMIT")
+                return self._record(row), False
+
+            job_id = os.urandom(6).hex()
+            conn.execute(
+                "INSERT INTO jobs (id, target, triggered_by, status, worker_pid, created_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, target, triggered_by, os.getpid(), datetime.now(timezone.utc).isoformat()),
+            )
+            conn.execute(
+                f"DELETE FROM jobs WHERE status NOT IN {VPN_JOB_ACTIVE} AND id NOT IN "
+                "(SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?)",
+                (VPN_JOBS_KEPT,),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(job_id), True
+
+    def _fail_orphans(self):
+        """Fail active jobs whose worker has exited (restarted or killed mid-switch)."""
+        rows = self._conn().execute(
+            f"SELECT id, worker_pid FROM jobs WHERE status IN {VPN_JOB_ACTIVE}"
+        ).fetchall()
+        for row in rows:
+            try:
+                os.kill(row["worker_pid"], 0)
+            except ProcessLookupError:
+                self.update(
+                    row["id"], status="failed",
+                    finished_at=datetime.now(timezone.utc).isoformat(),
+                    result={"error": "Worker running the switch exited"},
+                )
+            except PermissionError:
+                pass  # Alive, just not ours to signal
+
+    def get(self, job_id: str) -> dict | None:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._record(row) if row else None
+
+    def list(self) -> list:
+        rows = self._conn().execute(
+            "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (VPN_JOBS_KEPT,)
+        ).fetchall()
+        return [self._record(row) for row in rows]
+
+    def update(self, job_id: str, **fields):
+        for key in ("steps", "result"):
+            if key in fields:
+                fields[key] = json.dumps(fields[key])
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        self._conn().execute(
+            f"UPDATE jobs SET {assignments}, version = version + 1 WHERE id = ?",
+            (*fields.values(), job_id),
+        )
+
+
+vpn_jobs = VpnJobStore(VPN_JOBS_FILE)
+
+
+class VpnSwitchJob:
+    """Step timeline of one running switch, saved to vpn_jobs as it changes."""
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self._lock = threading.Lock()
+        self._steps = []
+
+    @contextmanager
+    def step(self, name: str):
+        """Record a step's start, end, duration and outcome.
+
+        The block may set step["detail"] (a steps_completed message) and
+        step["status"] = "warning". An exception marks the step "failed".
+        """
+        step = {"name": name, "status": "running", "started_at": datetime.now(timezone.utc).isoformat()}
+        started = time.monotonic()
+        with self._lock:
+            self._steps.append(step)
+            self._save()
+        try:
+            yield step
+        except BaseException as e:
+            step["status"] = "failed"
+            step.setdefault("detail", str(e))
+            raise
+        else:
+            if step["status"] == "running":
+                step["status"] = "ok"
+        finally:
+            step["finished_at"] = datetime.now(timezone.utc).isoformat()
+            step["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+            with self._lock:
+                self._save()
+
+    def skip(self, name: str, reason: str):
+        """Record a step that never ran because a dependency failed."""
+        with self._lock:
+            self._steps.append({"name": name, "status": "skipped", "detail": reason})
+            self._save()
+
+    def timeline(self) -> dict:
+        """{step name: step record} for the steps recorded so far."""
+        with self._lock:
+            return {step["name"]: dict(step) for step in self._steps}
+
+    def steps_completed(self) -> list:
+        """The human-readable step messages, as returned by the synchronous switch."""
+        with self._lock:
+            return [
+                step["detail"] for step in self._steps
+                if step["status"] not in ("failed", "skipped") and step.get("detail")
+            ]
+
+    def _save(self):
+        vpn_jobs.update(self.id, steps=self._steps)
+
+
+def _run_vpn_switch_job(job_id: str, target: str, triggered_by: str):
+    """Background task: wait for any other switch to finish, then run this one."""
+    job = VpnSwitchJob(job_id)
+    os.makedirs(os.path.dirname(VPN_SWITCH_LOCK), exist_ok=True)
+    fd = os.open(VPN_SWITCH_LOCK, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        vpn_jobs.update(job_id, status="running", started_at=datetime.now(timezone.utc).isoformat())
+        app.logger.info(f"VPN switch job {job_id} to {target} started ({triggered_by})")
+        try:
+            response, status_code = _do_vpn_switch(target, triggered_by, job)
+        except Exception as e:
+            response, status_code = {"error": str(e), "steps_completed": job.steps_completed()}, 500
+        status = "succeeded" if status_code == 200 else "failed"
+        vpn_jobs.update(
+            job_id, status=status, finished_at=datetime.now(timezone.utc).isoformat(), result=response
+        )
+        app.logger.info(f"VPN switch job {job_id} to {target} {status}")
+    finally:
+        os.close(fd)  # Releases the flock for the next queued switch
 
+
+def submit_vpn_switch(target: str, triggered_by: str):
+    """Queue a switch (or join an active one to the same target) and return 202 with the job."""
+    target = target.lower()
     if target not in VPN_LOCATIONS:
-        return {
+        return jsonify({
             "error": f"Invalid location: {target}",
             "valid_locations": list(VPN_LOCATIONS.keys())
-        }, 400
+        }), 400
+
+    job, created = vpn_jobs.submit(target, triggered_by)
+    if created:
+        thread = threading.Thread(
+            target=_run_vpn_switch_job, args=(job["id"], target, triggered_by), name=f"vpn-job-{job['id']}"
+        )
+        thread.daemon = True
+        thread.start()
+
+    prefix = "/api/admin" if request.path.startswith("/api/admin") else "/api/health"
+    return jsonify({
+        "job_id": job["id"],
+        "status": job["status"],
+        "target": target,
+        "deduplicated": not created,
+        "status_url": f"{prefix}/vpn/jobs/{job['id']}",
+        "stream_url": f"{prefix}/vpn/jobs/{job['id']}/stream",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }), 202
+
+
+def _job_events(job_id: str):
+    """SSE generator: the job record on every change, then `done` once it finishes."""
+    version = None
+    last_sent = time.monotonic()
+    deadline = last_sent + VPN_JOB_STREAM_TIMEOUT
+    while True:
+        if time.monotonic() > deadline:
+            yield "event: timeout\ndata: {}\n\n"
+            return
+        job = vpn_jobs.get(job_id)
+        if job is None:
+            yield "event: error\ndata: {\"error\": \"Job not found\"}\n\n"
+            return
+        if job["version"] != version:
+            version = job["version"]
+            last_sent = time.monotonic()
+            yield f"event: job\ndata: {json.dumps(job, separators=(',', ':'))}\n\n"
+        if job["status"] not in VPN_JOB_ACTIVE:
+            yield f"event: done\ndata: {json.dumps({'status': job['status']})}\n\n"
+            return
+        if time.monotonic() - last_sent > STREAM_KEEPALIVE:
+            last_sent = time.monotonic()
+            yield ": keepalive\n\n"
+        time.sleep(VPN_JOB_POLL)
+
+
+def vpn_job_response(job_id: str, stream: bool = False):
+    """A job's record (or its SSE progress stream), or 404."""
+    job = vpn_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    if not stream:
+        return jsonify(job)
+    if not _job_stream_slots.acquire(blocking=False):
+        return jsonify({"error": "Too many open streams", "status_url": request.path.rsplit("/", 1)[0]}), 503
+    response = app.response_class(
+        _job_events(job_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Released when the server closes the response, whether or not the stream was read
+    response.call_on_close(_job_stream_slots.release)
+    return response
+
+
+_job_stream_slots = threading.BoundedSemaphore(VPN_JOB_STREAM_MAX)
+
+
+class StepGraph:
+    """Runs a switch's steps as a dependency graph on `job`.
+
+    Each step starts as soon as the steps it comes `after` have finished
+    (ok or warning), so independent steps run concurrently. A failed step
+    skips everything that depends on it; steps already running finish.
+    """
+
+    def __init__(self, job: VpnSwitchJob, max_workers: int = 4):
+        self._job = job
+        self._max_workers = max_workers
+        self._steps = {}  # name -> (fn, after)
+        self.results = {}  # name -> fn's return value
+
+    def add(self, name: str, fn, after: tuple = ()):
+        """Add a step; fn(step) gets the job's step record and may set detail/status."""
+        self._steps[name] = (fn, after)
+
+    def _run_step(self, name: str, fn):
+        with self._job.step(name) as step:
+            return fn(step)
+
+    def run(self) -> Exception | None:
+        """Run every step; return the first failure, or None."""
+        pending = dict(self._steps)
+        running = {}  # Future -> name
+        finished, failed = set(), set()
+        failure = None
+        with ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix=f"vpn-{self._job.id}") as pool:
+            while pending or running:
+                changed = True
+                while changed:
+                    changed = False
+                    for name, (fn, after) in list(pending.items()):
+                        blocked = [dep for dep in after if dep in failed]
+                        if blocked:
+                            self._job.skip(name, f"Skipped: {', '.join(blocked)} did not complete")
+                            failed.add(name)
+                        elif all(dep in finished for dep in after):
+                            running[pool.submit(self._run_step, name, fn)] = name
+                        else:
+                            continue
+                        del pending[name]
+                        changed = True
+                if not running:
+                    break  # Only unreachable steps left (a dependency cycle)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                        finished.add(name)
+                    except Exception as e:
+                        failed.add(name)
+                        failure = failure or e
+        return failure
+
+    def critical_path(self) -> dict:
+        """The chain of dependent steps that determined the switch's duration.
+
+        Only steps that completed (ok or warning) count - failed, skipped
+        and unfinished steps are left out.
+        """
+        timeline = self._job.timeline()
+        completed = {
+            name: step["duration_ms"] for name, step in timeline.items()
+            if name in self._steps and step["status"] in ("ok", "warning") and step.get("duration_ms") is not None
+        }
+        longest = {}  # name -> (duration_ms of the longest chain ending here, chain)
+
+        def chain(name):
+            if name not in longest:
+                deps = [dep for dep in self._steps[name][1] if dep in completed]
+                before = max((chain(dep) for dep in deps), default=(0, []))
+                longest[name] = (before[0] + completed[name], before[1] + [name])
+            return longest[name]
+
+        duration_ms, steps = max((chain(name) for name in completed), default=(0, []))
+        return {"duration_ms": round(duration_ms, 1), "steps": steps}
+
 
+# Transmission readiness: poll quickly at first, backing off to READY_POLL_MAX
+READY_POLL_INITIAL = 0.1
+READY_POLL_MAX = 2.0
+READY_TIMEOUT = 30
+
+
+def wait_for_transmission(port: int) -> bool:
+    """Poll Transmission's RPC endpoint until it answers or READY_TIMEOUT passes."""
+    deadline = time.monotonic() + READY_TIMEOUT
+    interval = READY_POLL_INITIAL
+    while True:
+        try:
+            resp = http_session.get(f"{HOST_URL}:{port}/transmission/rpc", timeout=2)
+            # 401 = auth required, 409 = CSRF token needed - both mean it's responding
+            if resp.status_code in (200, 401, 409):
+                return True
+        except requests.exceptions.RequestException:
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, READY_POLL_MAX)
+
+
+def _since_ms(earlier: str, later: str) -> float:
+    """Milliseconds between two ISO timestamps."""
+    return round((datetime.fromisoformat(later) - datetime.fromisoformat(earlier)).total_seconds() * 1000, 1)
+
+
+def _do_vpn_switch(target: str, triggered_by: str, job: VpnSwitchJob) -> tuple[dict, int]:
+    """Core VPN switch logic, run as a step graph on `job`. Returns (response_dict, status_code).
+
+    Everything that doesn't need Transmission stopped (validating the target,
+    rewriting compose and nginx configs, reading the forwarded port) happens
+    before it is stopped, and the Sonarr/Radarr/nginx/speedtest updates run
+    concurrently once it's back, to keep its downtime short.
+    """
     target_config = VPN_LOCATIONS[target]
     target_container = target_config["container"]
     target_port = target_config["port"]
+    graph = StepGraph(job)
 
-    steps_completed = []
+    # Verify target VPN container exists and is running - nothing is touched until it is
+    def check_vpn_container(step):
+        try:
+            with timed("calls", "docker_inspect"):
+                running = docker_api().inspect_container(target_container)["State"]["Running"]
+        except docker.errors.NotFound:
+            running = False
+        if not running:
+            raise VpnSwitchError(f"Target VPN container {target_container} not running")
 
-    try:
-        # Step 1: Update docker-compose.yaml
+    # Update docker-compose.yaml
+    def update_compose(step):
         if not Path(DOCKER_COMPOSE_FILE).exists():
-            return {"error": f"Docker compose file not found: {DOCKER_COMPOSE_FILE}"}, 500
+            raise VpnSwitchError(f"Docker compose file not found: {DOCKER_COMPOSE_FILE}")
 
         with open(DOCKER_COMPOSE_FILE, "r") as f:
             compose_content = f.read()
@@ -1055,92 +3737,12 @@ def _do_vpn_switch(target: str, triggered_by: str) -> tuple[dict, int]:
 
         with open(DOCKER_COMPOSE_FILE, "w") as f:
             f.write(new_content)
-        steps_completed.append("Updated docker-compose.yaml")
-
-        # Step 2: Recreate transmission container
-        subprocess.run(["docker", "stop", "transmission"], capture_output=True, timeout=30)
-        subprocess.run(["docker", "rm", "transmission"], capture_output=True, timeout=30)
-
-        # Verify target VPN container exists and is running
-        gluetun_result = subprocess.run(
-            ["docker", "inspect", target_container, "--format", "{{.State.Running}}"],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        if gluetun_result.returncode != 0 or gluetun_result.stdout.strip() != "true":
-            return {
-                "error": f"Target VPN container {target_container} not running",
-                "steps_completed": steps_completed
-            }, 500
-
-        # Step 2b: Sync Transmission peer port to match new VPN's forwarded port
-        # Transmission is stopped here so settings.json is safe to write
-        forwarded_port = get_gluetun_forwarded_port(target_container)
-        if forwarded_port:
-            port_result = set_transmission_peer_port(forwarded_port)
-            if port_result["success"]:
-                steps_completed.append(f"Synced Transmission peer-port to {forwarded_port} (gluetun forwarded port)")
-            else:
-                steps_completed.append(f"Warning: could not sync peer-port: {port_result['error']}")
-        else:
-            steps_completed.append("Warning: could not read gluetun forwarded port — peer-port not updated")
-
-        # Use docker compose to start transmission (reads updated docker-compose.yaml)
-        # Run from docker-services directory to auto-detect project name and avoid network label issues
-        # Note: /docker-services is the mount point inside the container
-        result = subprocess.run(
-            ["docker", "compose", "up", "-d", "transmission"],
-            capture_output=True,
-            text=True,
-            timeout=120,
-            cwd="/docker-services"
-        )
-
-        if result.returncode != 0:
-            return {
-                "error": "Failed to start transmission container",
-                "stderr": result.stderr,
-                "steps_completed": steps_completed
-            }, 500
-
-        steps_completed.append("Recreated transmission container")
-
-        # Step 3: Wait for Transmission to be ready on new port
-        max_wait = 30  # seconds
-        transmission_ready = False
-        for i in range(max_wait):
-            try:
-                resp = requests.get(f"{HOST_URL}:{target_port}/transmission/rpc", timeout=2)
-                # 401 = auth required, 409 = CSRF token needed - both mean it's responding
-                if resp.status_code in (200, 401, 409):
-                    transmission_ready = True
-                    break
-            except requests.exceptions.RequestException:
-                pass
-            time.sleep(1)
-
-        if transmission_ready:
-            steps_completed.append("Transmission is ready")
-        else:
-            steps_completed.append(f"Warning: Transmission not responding on port {target_port} after {max_wait}s")
-
-        # Step 4: Update Sonarr/Radarr download client ports (after Transmission is ready)
-        sonarr_result = update_arr_download_client_port("Sonarr", SONARR_URL, SONARR_API_KEY, target_port)
-        if sonarr_result["success"]:
-            steps_completed.append(sonarr_result["message"])
-        else:
-            steps_completed.append(f"Warning: {sonarr_result['error']}")
-
-        radarr_result = update_arr_download_client_port("Radarr", RADARR_URL, RADARR_API_KEY, target_port)
-        if radarr_result["success"]:
-            steps_completed.append(radarr_result["message"])
-        else:
-            steps_completed.append(f"Warning: {radarr_result['error']}")
+        step["detail"] = "Updated docker-compose.yaml"
 
-        # Step 5: Update nginx config
+    # Update nginx config (takes effect on reload)
+    def update_nginx_config(step):
         if not Path(NGINX_TRANSMISSION_CONF).exists():
-            return {"error": f"Nginx config not found: {NGINX_TRANSMISSION_CONF}"}, 500
+            raise VpnSwitchError(f"Nginx config not found: {NGINX_TRANSMISSION_CONF}")
 
         with open(NGINX_TRANSMISSION_CONF, "r") as f:
             nginx_content = f.read()
@@ -1168,24 +3770,83 @@ def _do_vpn_switch(target: str, triggered_by: str) -> tuple[dict, int]:
 
         with open(NGINX_TRANSMISSION_CONF, "w") as f:
             f.write(new_nginx)
-        steps_completed.append("Updated nginx config")
+        step["detail"] = "Updated nginx config"
 
-        # Step 6: Reload nginx
-        result = subprocess.run(
-            ["docker", "exec", "nginx-proxy", "nginx", "-s", "reload"],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+    def read_forwarded_port(step):
+        return get_gluetun_forwarded_port(target_container)
+
+    # Stop and remove transmission - it is offline from here until wait_transmission_ready
+    def remove_transmission(step):
+        api = docker_api()
+        # Either may fail if transmission is already stopped or gone - compose recreates it regardless
+        try:
+            with timed("calls", "docker_stop"):
+                api.stop("transmission", timeout=10)
+        except docker.errors.APIError as e:
+            app.logger.warning(f"docker stop transmission: {e}")
+        try:
+            with timed("calls", "docker_remove"):
+                api.remove_container("transmission")
+        except docker.errors.APIError as e:
+            app.logger.warning(f"docker rm transmission: {e}")
+
+    # Sync Transmission peer port to match new VPN's forwarded port
+    # Transmission is stopped here so settings.json is safe to write
+    def sync_peer_port(step):
+        forwarded_port = graph.results["read_forwarded_port"]
+        if forwarded_port:
+            port_result = set_transmission_peer_port(forwarded_port)
+            if port_result["success"]:
+                step["detail"] = f"Synced Transmission peer-port to {forwarded_port} (gluetun forwarded port)"
+            else:
+                step["status"] = "warning"
+                step["detail"] = f"Warning: could not sync peer-port: {port_result['error']}"
+        else:
+            step["status"] = "warning"
+            step["detail"] = "Warning: could not read gluetun forwarded port — peer-port not updated"
+
+    # Use docker compose to start transmission (reads updated docker-compose.yaml)
+    # Run from docker-services directory to auto-detect project name and avoid network label issues
+    # Note: /docker-services is the mount point inside the container
+    def start_transmission(step):
+        with timed("calls", "docker_compose_up"):
+            result = subprocess.run(
+                ["docker", "compose", "up", "-d", "transmission"],
+                capture_output=True,
+                text=True,
+                timeout=120,
+                cwd="/docker-services"
+            )
         if result.returncode != 0:
-            return {
-                "error": "Failed to reload nginx",
-                "stderr": result.stderr,
-                "steps_completed": steps_completed
-            }, 500
-        steps_completed.append("Reloaded nginx")
+            raise VpnSwitchError("Failed to start transmission container", stderr=result.stderr)
+        step["detail"] = "Recreated transmission container"
 
-        # Step 7: Update speedtest.json
+    def wait_transmission_ready(step):
+        if wait_for_transmission(target_port):
+            step["detail"] = "Transmission is ready"
+        else:
+            step["status"] = "warning"
+            step["detail"] = f"Warning: Transmission not responding on port {target_port} after {READY_TIMEOUT}s"
+
+    # Sonarr/Radarr validate the connection, so they wait for Transmission to be ready
+    def update_arr(app_name, api_url, api_key):
+        def run(step):
+            arr_result = update_arr_download_client_port(app_name, api_url, api_key, target_port)
+            if arr_result["success"]:
+                step["detail"] = arr_result["message"]
+            else:
+                step["status"] = "warning"
+                step["detail"] = f"Warning: {arr_result['error']}"
+        return run
+
+    def reload_nginx(step):
+        exit_code, _, stderr = docker_exec("nginx-proxy", ["nginx", "-s", "reload"])
+        if exit_code != 0:
+            raise VpnSwitchError("Failed to reload nginx", stderr=stderr)
+        step["detail"] = "Reloaded nginx"
+
+    # Mark the new VPN active in speedtest.json
+    def update_speedtest_json(step):
         try:
             speedtest_path = Path(SPEEDTEST_FILE)
             if speedtest_path.exists():
@@ -1198,97 +3859,307 @@ def _do_vpn_switch(target: str, triggered_by: str) -> tuple[dict, int]:
 
                     with open(speedtest_path, "w") as f:
                         json.dump(speedtest_data, f, indent=2)
-                    steps_completed.append("Updated speedtest.json active status")
+                    step["detail"] = "Updated speedtest.json active status"
         except Exception as e:
-            steps_completed.append(f"Note: Could not update speedtest.json: {e}")
+            step["status"] = "warning"
+            step["detail"] = f"Note: Could not update speedtest.json: {e}"
+
+    graph.add("check_vpn_container", check_vpn_container)
+    graph.add("update_compose", update_compose, after=("check_vpn_container",))
+    graph.add("update_nginx_config", update_nginx_config, after=("check_vpn_container",))
+    graph.add("read_forwarded_port", read_forwarded_port, after=("check_vpn_container",))
+    graph.add("remove_transmission", remove_transmission, after=("update_compose", "update_nginx_config"))
+    graph.add("sync_peer_port", sync_peer_port, after=("remove_transmission", "read_forwarded_port"))
+    graph.add("start_transmission", start_transmission, after=("sync_peer_port",))
+    graph.add("wait_transmission_ready", wait_transmission_ready, after=("start_transmission",))
+    graph.add("update_sonarr", update_arr("Sonarr", SONARR_URL, SONARR_API_KEY), after=("wait_transmission_ready",))
+    graph.add("update_radarr", update_arr("Radarr", RADARR_URL, RADARR_API_KEY), after=("wait_transmission_ready",))
+    graph.add("reload_nginx", reload_nginx, after=("start_transmission",))
+    graph.add("update_speedtest_json", update_speedtest_json, after=("start_transmission",))
+
+    failure = graph.run()
+    timings = {"critical_path": graph.critical_path()}
+    timeline = job.timeline()
+    if "finished_at" in timeline.get("wait_transmission_ready", {}):
+        timings["transmission_offline_ms"] = _since_ms(
+            timeline["remove_transmission"]["started_at"], timeline["wait_transmission_ready"]["finished_at"]
+        )
 
-        return {
-            "success": True,
-            "message": f"Switched VPN to {target}",
-            "new_location": target,
-            "new_port": target_port,
-            "steps_completed": steps_completed,
-            "switched_by": triggered_by,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        }, 200
+    if isinstance(failure, VpnSwitchError):
+        return {"error": str(failure), **failure.details, "steps_completed": job.steps_completed(), **timings}, 500
+    if isinstance(failure, subprocess.TimeoutExpired):
+        return {"error": "Command timed out", "steps_completed": job.steps_completed(), **timings}, 500
+    if failure is not None:
+        return {"error": str(failure), "steps_completed": job.steps_completed(), **timings}, 500
 
-    except subprocess.TimeoutExpired:
-        return {
-            "error": "Command timed out",
-            "steps_completed": steps_completed
-        }, 500
-    except Exception as e:
-        return {
-            "error": str(e),
-            "steps_completed": steps_completed
-        }, 500
+    return {
+        "success": True,
+        "message": f"Switched VPN to {target}",
+        "new_location": target,
+        "new_port": target_port,
+        "steps_completed": job.steps_completed(),
+        **timings,
+        "switched_by": triggered_by,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }, 200
 
 
 @app.route("/api/health/vpn/switch", methods=["POST"])
 @require_api_key
 def api_vpn_switch():
-    """Switch VPN - API key authenticated (for gcp-monitor auto-failover)."""
+    """Switch VPN - API key authenticated (for gcp-monitor auto-failover).
+
+    Returns 202 with a job ID; poll /api/health/vpn/jobs/<id> for the result.
+    """
     data = request.get_json() or {}
     target = data.get("location", "")
     reason = data.get("reason", "api-triggered")
+    return submit_vpn_switch(target, f"api ({reason})")
+
 
-    response, status_code = _do_vpn_switch(target, f"api ({reason})")
-    return jsonify(response), status_code
+@app.route("/api/health/vpn/jobs")
+@require_api_key
+def api_vpn_jobs():
+    """Recent VPN switch jobs, newest first."""
+    return jsonify({"jobs": vpn_jobs.list()})
+
+
+@app.route("/api/health/vpn/jobs/<job_id>")
+@require_api_key
+def api_vpn_job(job_id):
+    """One VPN switch job: status, step timeline and (once finished) result."""
+    return vpn_job_response(job_id)
+
+
+@app.route("/api/health/vpn/jobs/<job_id>/stream")
+@require_api_key
+def api_vpn_job_stream(job_id):
+    """SSE progress of a VPN switch job."""
+    return vpn_job_response(job_id, stream=True)
 
 
 @app.route("/api/admin/vpn/switch", methods=["POST"])
 @require_admin
 def admin_vpn_switch():
-    """Switch VPN location for Transmission (OAuth protected)."""
+    """Switch VPN location for Transmission (OAuth protected) - returns 202 with a job ID."""
     data = request.get_json() or {}
     target = data.get("location", "")
     email = request.headers.get("X-Forwarded-Email", "unknown")
-
-    response, status_code = _do_vpn_switch(target, email)
-    return jsonify(response), status_code
+    return submit_vpn_switch(target, email)
 
 
-# Legacy admin_vpn_switch code removed - now uses _do_vpn_switch helper
-# The old implementation is preserved in the helper function above
+@app.route("/api/admin/vpn/jobs/<job_id>")
+@require_admin
+def admin_vpn_job(job_id):
+    """Same as /api/health/vpn/jobs/<id>, for browsers (OAuth cookie instead of API key)."""
+    return vpn_job_response(job_id)
 
 
-def _do_container_restart(container_name: str, email: str):
-    """Background task to restart a container."""
-    try:
-        result = subprocess.run(
-            ["docker", "restart", container_name],
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
-        if result.returncode != 0:
-            app.logger.error(f"Container restart failed: {container_name} by {email}: {result.stderr}")
+@app.route("/api/admin/vpn/jobs/<job_id>/stream")
+@require_admin
+def admin_vpn_job_stream(job_id):
+    """Same as /api/health/vpn/jobs/<id>/stream, for browsers."""
+    return vpn_job_response(job_id, stream=True)
+
+
+# ============== CONTAINER OPERATIONS ==============
+# Container restarts run on a small bounded pool instead of a thread per
+# request. Operations on one container never overlap - a per-container flock
+# holds across both workers - and a request for an operation that is already
+# queued or running on that container joins it rather than queueing another.
+# Operation records live in SQLite under /tmp so the dashboard can poll one
+# record through either worker.
+
+CONTAINER_OPS_FILE = os.environ.get("CONTAINER_OPS_FILE", "/tmp/health-api/container-ops.db")
+CONTAINER_OP_LOCK_DIR = "/tmp/health-api"
+CONTAINER_OP_WORKERS = 2  # concurrent operations per gunicorn worker
+CONTAINER_OPS_KEPT = 200  # finished operations older than the newest 200 are pruned
+CONTAINER_OP_ACTIVE = ("queued", "running")
+
+
+class ContainerOpStore:
+    """Container operation records (status, timestamps, exit status) shared by both workers."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()  # one connection per thread
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ops ("
+                "id TEXT PRIMARY KEY, container TEXT NOT NULL, action TEXT NOT NULL,"
+                " requested_by TEXT NOT NULL, status TEXT NOT NULL, worker_pid INTEGER NOT NULL,"
+                " queued_at TEXT NOT NULL, started_at TEXT, finished_at TEXT, duration_ms REAL,"
+                " exit_status INTEGER, error TEXT, joined INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def submit(self, container: str, action: str, requested_by: str) -> tuple[dict, bool]:
+        """Create a queued operation, or join the active one for the same container and action.
+
+        Returns (op, created). The check and insert share one write
+        transaction, so two workers can't both queue the same operation.
+        """
+        self._fail_orphans()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT id FROM ops WHERE container = ? AND action = ? AND status IN {CONTAINER_OP_ACTIVE} "
+                "ORDER BY queued_at",
+                (container, action),
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE ops SET joined = joined + 1 WHERE id = ?", (row["id"],))
+                conn.execute("COMMIT")
+                return self.get(row["id"]), False
+
+            op_id = os.urandom(6).hex()
+            conn.execute(
+                "INSERT INTO ops (id, container, action, requested_by, status, worker_pid, queued_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (op_id, container, action, requested_by, os.getpid(), datetime.now(timezone.utc).isoformat()),
+            )
+            conn.execute(
+                f"DELETE FROM ops WHERE status NOT IN {CONTAINER_OP_ACTIVE} AND id NOT IN "
+                "(SELECT id FROM ops ORDER BY queued_at DESC LIMIT ?)",
+                (CONTAINER_OPS_KEPT,),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(op_id), True
+
+    def _fail_orphans(self):
+        """Fail active operations whose worker has exited (restarted or killed mid-operation)."""
+        rows = self._conn().execute(
+            f"SELECT id, worker_pid FROM ops WHERE status IN {CONTAINER_OP_ACTIVE}"
+        ).fetchall()
+        for row in rows:
+            try:
+                os.kill(row["worker_pid"], 0)
+            except ProcessLookupError:
+                self.update(
+                    row["id"], status="failed", exit_status=1,
+                    finished_at=datetime.now(timezone.utc).isoformat(),
+                    error="Worker running the operation exited",
+                )
+            except PermissionError:
+                pass  # Alive, just not ours to signal
+
+    def get(self, op_id: str) -> dict | None:
+        row = self._conn().execute("SELECT * FROM ops WHERE id = ?", (op_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, container: str | None = None) -> list:
+        if container:
+            rows = self._conn().execute(
+                "SELECT * FROM ops WHERE container = ? ORDER BY queued_at DESC LIMIT ?",
+                (container, CONTAINER_OPS_KEPT),
+            ).fetchall()
         else:
-            app.logger.info(f"Container restarted: {container_name} by {email}")
-    except Exception as e:
-        app.logger.error(f"Container restart exception: {container_name} by {email}: {e}")
+            rows = self._conn().execute(
+                "SELECT * FROM ops ORDER BY queued_at DESC LIMIT ?", (CONTAINER_OPS_KEPT,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def update(self, op_id: str, **fields):
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        self._conn().execute(f"UPDATE ops SET {assignments} WHERE id = ?", (*fields.values(), op_id))
+
+
+container_ops = ContainerOpStore(CONTAINER_OPS_FILE)
+
+
+def _restart_container(container_name: str):
+    with timed("calls", "docker_restart"):
+        docker_api().restart(container_name, timeout=10)
+
+
+class ContainerOpExecutor:
+    """Runs container operations on a bounded pool, one at a time per container."""
+
+    ACTIONS = {"restart": _restart_container}
+
+    def __init__(self, store: ContainerOpStore, max_workers: int):
+        self._store = store
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="container-op")
+
+    def submit(self, container: str, action: str, requested_by: str) -> tuple[dict, bool]:
+        """Queue an operation (or join an active one); returns (op, created)."""
+        op, created = self._store.submit(container, action, requested_by)
+        if created:
+            self._pool.submit(self._run, op["id"], container, action, requested_by)
+        return op, created
+
+    def _run(self, op_id: str, container: str, action: str, requested_by: str):
+        os.makedirs(CONTAINER_OP_LOCK_DIR, exist_ok=True)
+        lock_path = os.path.join(CONTAINER_OP_LOCK_DIR, f"container-{container}.lock")
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)  # Waits out any other operation on this container
+            self._store.update(op_id, status="running", started_at=datetime.now(timezone.utc).isoformat())
+            started = time.monotonic()
+            exit_status, error = 0, None
+            try:
+                self.ACTIONS[action](container)
+                app.logger.info(f"Container {action} done: {container} by {requested_by}")
+            except docker.errors.APIError as e:
+                exit_status, error = e.status_code or 1, str(e.explanation or e)
+                app.logger.error(f"Container {action} failed: {container} by {requested_by}: {error}")
+            except Exception as e:
+                exit_status, error = 1, str(e)
+                app.logger.error(f"Container {action} exception: {container} by {requested_by}: {e}")
+            self._store.update(
+                op_id,
+                status="succeeded" if exit_status == 0 else "failed",
+                finished_at=datetime.now(timezone.utc).isoformat(),
+                duration_ms=round((time.monotonic() - started) * 1000, 1),
+                exit_status=exit_status,
+                error=error,
+            )
+        except Exception as e:
+            # The record store itself failed - don't leave the op looking active
+            app.logger.error(f"Container op {op_id} ({action} {container}) crashed: {e}")
+            try:
+                self._store.update(
+                    op_id, status="failed", exit_status=1, error=str(e),
+                    finished_at=datetime.now(timezone.utc).isoformat(),
+                )
+            except Exception:
+                pass
+        finally:
+            os.close(fd)  # Releases the flock for the next operation on this container
+
+
+container_op_executor = ContainerOpExecutor(container_ops, CONTAINER_OP_WORKERS)
+
+
+def restartable_containers() -> set:
+    """Containers the dashboard may restart: every monitored container except health-api."""
+    # Don't allow restarting health-api itself
+    return monitored_containers() - {"health-api"}
 
 
 @app.route("/api/admin/container/restart", methods=["POST"])
 @require_admin
 def admin_container_restart():
-    """Restart a Docker container (async - returns immediately)."""
+    """Queue a Docker container restart (async - returns the operation record immediately)."""
     data = request.get_json() or {}
     container_name = data.get("container", "").strip()
 
     if not container_name:
         return jsonify({"error": "container name required"}), 400
 
-    # Build allowed container list from SERVICE_CHECKS and VPN_LOCATIONS
-    allowed_containers = set()
-    for svc in SERVICE_CHECKS:
-        allowed_containers.add(svc["container"])
-    for config in VPN_LOCATIONS.values():
-        allowed_containers.add(config["container"])
-
-    # Don't allow restarting health-api itself
-    allowed_containers.discard("health-api")
-
+    allowed_containers = restartable_containers()
     if container_name not in allowed_containers:
         return jsonify({
             "error": f"Container '{container_name}' not in allowed list",
@@ -1297,18 +4168,79 @@ def admin_container_restart():
 
     email = request.headers.get("X-Forwarded-Email", "unknown")
 
-    # Start restart in background thread and return immediately
-    thread = threading.Thread(target=_do_container_restart, args=(container_name, email))
-    thread.daemon = True
-    thread.start()
+    op, created = container_op_executor.submit(container_name, "restart", email)
+    if created:
+        message = f"Container '{container_name}' restart initiated"
+    else:
+        message = f"Container '{container_name}' restart already in progress"
 
-    # Return immediately - frontend will refresh status to see result
+    # Frontend polls status_url until the operation finishes
     return jsonify({
         "success": True,
         "status": "restarting",
-        "message": f"Container '{container_name}' restart initiated",
+        "message": message,
         "container": container_name,
-        "restarted_by": email,
+        "restarted_by": op["requested_by"],
+        "op_id": op["id"],
+        "op_status": op["status"],
+        "coalesced": not created,
+        "status_url": f"/api/admin/container/ops/{op['id']}",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }), 202
+
+
+@app.route("/api/admin/container/ops")
+@require_admin
+def admin_container_ops():
+    """Recent container operations, newest first (?container= to filter)."""
+    container_name = request.args.get("container", "").strip() or None
+    return jsonify({"ops": container_ops.list(container_name)})
+
+
+@app.route("/api/admin/container/ops/<op_id>")
+@require_admin
+def admin_container_op(op_id):
+    """One container operation record, for polling after a restart."""
+    op = container_ops.get(op_id)
+    if op is None:
+        return jsonify({"error": f"Unknown operation: {op_id}"}), 404
+    return jsonify(op)
+
+
+def _do_smart_refresh(devices: list, email: str):
+    """Background task to re-read SMART data, waking drives in standby."""
+    app.logger.info(f"SMART refresh of {', '.join(devices)} by {email}")
+    smart_collector.collect(devices, force=True, block=True)
+    _sampler.refresh("storage")
+
+
+@app.route("/api/admin/storage/smart/refresh", methods=["POST"])
+@require_admin
+def admin_smart_refresh():
+    """Force a fresh SMART read (spins up sleeping drives) - async, returns immediately."""
+    data = request.get_json(silent=True) or {}
+    known_devices = list(SYSTEM_DRIVES) + get_raid_members()
+    devices = data.get("devices") or known_devices
+
+    unknown = sorted(set(devices) - set(known_devices))
+    if unknown:
+        return jsonify({
+            "error": f"Unknown devices: {', '.join(unknown)}",
+            "allowed": known_devices,
+        }), 400
+
+    email = request.headers.get("X-Forwarded-Email", "unknown")
+
+    thread = threading.Thread(target=_do_smart_refresh, args=(devices, email))
+    thread.daemon = True
+    thread.start()
+
+    return jsonify({
+        "success": True,
+        "status": "refreshing",
+        "message": "SMART refresh initiated - drives in standby will spin up",
+        "devices": devices,
+        "requested_by": email,
         "timestamp": datetime.now(timezone.utc).isoformat(),
     })
 
@@ -0,0 +1,27 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app.py reads its settings at import time
+_state_dir = tempfile.mkdtemp(prefix="health-api-tests-")
+os.environ.setdefault("HEALTH_API_KEY", "test-key")
+os.environ.setdefault("SHARED_CACHE_FILE", os.path.join(_state_dir, "cache.db"))
+os.environ.setdefault("SINGLE_FLIGHT_DIR", _state_dir)
+os.environ.setdefault("VPN_JOBS_FILE", os.path.join(_state_dir, "vpn-jobs.db"))
+os.environ.setdefault("CONTAINER_OPS_FILE", os.path.join(_state_dir, "container-ops.db"))
+os.environ.setdefault("SERIES_FILE", os.path.join(_state_dir, "health-series.bin"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
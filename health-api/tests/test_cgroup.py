@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.fixture
+def cgroup_root(app_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, "CGROUP_ROOT", str(tmp_path))
+    monkeypatch.setattr(app_module, "_cgroup_paths", {})
+    return tmp_path
+
+
+def make_cgroup(root, container_id, files):
+    path = root / "system.slice" / f"docker-{container_id}.scope"
+    path.mkdir(parents=True)
+    for name, content in files.items():
+        (path / name).write_text(content)
+    return path
+
+
+def test_reads_memory_cpu_and_io(app_module, cgroup_root):
+    make_cgroup(cgroup_root, "abc", {
+        "memory.current": "3000\n",
+        "memory.max": "max\n",
+        "memory.stat": "anon 2000\nfile 900\ninactive_file 500\n",
+        "cpu.stat": "usage_usec 100\nuser_usec 60\nsystem_usec 40\n",
+        "io.stat": "8:0 rbytes=10 wbytes=20 rios=1 wios=2\n259:0 rbytes=5 wbytes=5 rios=1 wios=1\n",
+    })
+
+    stats = app_module.read_cgroup_stats("abc")
+
+    assert stats["memory_used_bytes"] == 2500
+    assert stats["memory_anon_bytes"] == 2000
+    assert stats["memory_limit_bytes"] is None
+    assert stats["cpu_usage_usec"] == 100
+    assert (stats["io_read_bytes"], stats["io_write_bytes"]) == (15, 25)
+
+
+def test_missing_controllers_keep_memory(app_module, cgroup_root):
+    # No io or cpu controller delegated to the cgroup
+    make_cgroup(cgroup_root, "abc", {
+        "memory.current": "3000\n",
+        "memory.max": "8000\n",
+        "memory.stat": "anon 2000\nfile 900\ninactive_file 500\n",
+    })
+
+    stats = app_module.read_cgroup_stats("abc")
+
+    assert stats["memory_used_bytes"] == 2500
+    assert stats["memory_limit_bytes"] == 8000
+    assert stats["cpu_usage_usec"] is None
+    assert stats["io_read_bytes"] is None
+
+
+def test_unknown_container(app_module, cgroup_root):
+    assert app_module.read_cgroup_stats("missing") is None
@@ -0,0 +1,38 @@
+import pytest
+
+HEADERS = {"X-API-Key": "test-key"}
+
+
+@pytest.fixture
+def sampler(app_module, monkeypatch):
+    sampler = app_module.ContainerResourceSampler(10)
+    sampler._view = {
+        "containers": [
+            {"name": name, "cpu_percent": cpu, "memory_bytes": 0, "io_read_bps": None,
+             "io_write_bps": None, "net_rx_bps": None, "net_tx_bps": None}
+            for name, cpu in (("plex", 80.0), ("sonarr", 5.0), ("gluetun-toronto", 1.0))
+        ],
+        "sampled_at": "2026-01-01T00:00:00+00:00",
+    }
+    monkeypatch.setattr(app_module, "container_resources", sampler)
+    return sampler
+
+
+def test_sorted_by_cpu(client, sampler):
+    response = client.get("/api/health/containers", headers=HEADERS)
+    assert [c["name"] for c in response.get_json()["containers"]] == ["plex", "sonarr", "gluetun-toronto"]
+
+
+def test_limit(client, sampler):
+    response = client.get("/api/health/containers?limit=1", headers=HEADERS)
+    assert [c["name"] for c in response.get_json()["containers"]] == ["plex"]
+
+
+@pytest.mark.parametrize("limit", ["0", "-1", "abc"])
+def test_invalid_limit_rejected(client, sampler, limit):
+    response = client.get(f"/api/health/containers?limit={limit}", headers=HEADERS)
+    assert response.status_code == 400
+
+
+def test_unknown_sort_rejected(client, sampler):
+    assert client.get("/api/health/containers?sort=bogus", headers=HEADERS).status_code == 400
@@ -0,0 +1,16 @@
+HEADERS = {"X-API-Key": "test-key"}
+
+
+def test_compute_ms_is_last_collection(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module.latency, "last", lambda kind, name: 1234.5 if name == "load" else None)
+
+    body = client.get("/api/health?sections=load,speed_test", headers=HEADERS).get_json()
+
+    assert body["compute_ms"]["load"] == 1234.5
+    assert body["wait_ms"]["load"] < 1234.5
+    assert set(body["wait_ms"]) == {"load", "speed_test"}
+
+
+def test_compact_drops_timings(client):
+    body = client.get("/api/health?sections=load&format=compact", headers=HEADERS).get_json()
+    assert "compute_ms" not in body and "wait_ms" not in body
@@ -0,0 +1,8 @@
+def test_metrics_scrape_keeps_storage_awake(app_module, client, monkeypatch):
+    requested = []
+    monkeypatch.setattr(app_module._sampler, "request", requested.extend)
+
+    response = client.get("/metrics", headers={"X-API-Key": "test-key"})
+
+    assert response.status_code == 200
+    assert "storage" in requested
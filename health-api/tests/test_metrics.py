@@ -0,0 +1,40 @@
+def render(app_module, openmetrics):
+    m = app_module.MetricsWriter()
+    m.add("http_requests", "counter", "Outbound HTTP requests", 5, pool="plex")
+    m.add("cpu_usage_percent", "gauge", "CPU usage", 12.5)
+    return m.render(openmetrics).splitlines()
+
+
+def test_openmetrics_declares_counter_family(app_module):
+    lines = render(app_module, openmetrics=True)
+    assert "# TYPE home_http_requests counter" in lines
+    assert 'home_http_requests_total{pool="plex"} 5' in lines
+    assert lines[-1] == "# EOF"
+
+
+def test_prometheus_text_declares_total_series(app_module):
+    lines = render(app_module, openmetrics=False)
+    assert "# TYPE home_http_requests_total counter" in lines
+    assert "# HELP home_http_requests_total Outbound HTTP requests" in lines
+    assert 'home_http_requests_total{pool="plex"} 5' in lines
+    assert "# TYPE home_cpu_usage_percent gauge" in lines
+    assert "# EOF" not in lines
+
+
+def test_metrics_route_negotiates_format(client):
+    headers = {"X-API-Key": "test-key"}
+    plain = client.get("/metrics", headers=headers)
+    assert plain.content_type.startswith("text/plain; version=0.0.4")
+
+    openmetrics = client.get("/metrics", headers={**headers, "Accept": "application/openmetrics-text"})
+    assert openmetrics.content_type.startswith("application/openmetrics-text")
+    assert openmetrics.get_data(as_text=True).endswith("# EOF\n")
+
+
+def test_http_counters_labelled_by_worker(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, "get_http_pool_stats",
+                        lambda: {"pools": {"plex": {"requests": 3, "new_connections": 1}}})
+
+    text = client.get("/metrics", headers={"X-API-Key": "test-key"}).get_data(as_text=True)
+
+    assert f'home_http_requests_total{{pool="plex",worker="{app_module.os.getpid()}"}} 3' in text
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+import requests
+
+
+class FakeCache:
+    """Just enough of SharedCache for PlexCollector: entries with a chosen age."""
+
+    def __init__(self, app_module):
+        self._entry = app_module.CacheEntry
+        self.entries = {}
+
+    def put(self, key, value, age):
+        self.entries[key] = (value, time.time() - age)
+
+    def get(self, key, max_age=None, allow_stale=False):
+        return None  # every part is due
+
+    def peek(self, key):
+        if key not in self.entries:
+            return None
+        value, stored_at = self.entries[key]
+        return self._entry(value, stored_at, False)
+
+    def set(self, key, value, ttl):
+        self.entries[key] = (value, time.time())
+
+
+@pytest.fixture
+def cache(app_module, monkeypatch):
+    cache = FakeCache(app_module)
+    monkeypatch.setattr(app_module, "shared_cache", cache)
+    return cache
+
+
+def collector(app_module, libraries, streams):
+    plex = app_module.PlexCollector()
+    plex._fetchers = {"libraries": libraries, "streams": streams}
+    return plex
+
+
+def fails(exc):
+    def fetch():
+        raise exc
+    return fetch
+
+
+LIBRARIES = [{"title": "Movies"}]
+STREAMS = {"total": 1}
+
+
+def test_fresh_fetch(app_module, cache):
+    status = collector(app_module, lambda: LIBRARIES, lambda: STREAMS).status()
+    assert status["reachable"] is True
+    assert "stale" not in status
+
+
+def test_timeout_serves_recent_part_as_stale(app_module, cache):
+    cache.put("plex:streams", STREAMS, age=60)
+    status = collector(app_module, lambda: LIBRARIES, fails(requests.exceptions.Timeout())).status()
+    assert status["reachable"] is True
+    assert status["stale"] is True
+
+
+def test_fresh_libraries_do_not_hide_old_streams(app_module, cache):
+    cache.put("plex:streams", STREAMS, age=app_module.PLEX_STALE_MAX + 60)
+    status = collector(app_module, lambda: LIBRARIES, fails(requests.exceptions.Timeout())).status()
+    assert status["reachable"] is False
+
+
+def test_non_timeout_error_is_unreachable(app_module, cache):
+    cache.put("plex:libraries", LIBRARIES, age=10)
+    cache.put("plex:streams", STREAMS, age=10)
+    plex = collector(
+        app_module,
+        fails(requests.exceptions.Timeout()),
+        fails(requests.exceptions.ConnectionError("refused")),
+    )
+    status = plex.status()
+    assert status["reachable"] is False
+    assert "refused" in status["error"]
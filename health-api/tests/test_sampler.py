@@ -0,0 +1,36 @@
+import itertools
+import time
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_refresh_reruns_shared_collector(app_module):
+    runs = itertools.count(1)
+    collector = app_module.shared_collector("test-refresh", lambda: next(runs), max_age=300)
+    sampler = app_module.SectionSampler({"section": collector}, {"section": 3600})
+    sampler.start()
+    assert sampler.get("section")["value"] == 1
+
+    # A plain call reuses the shared result; refresh() must not
+    assert collector() == 1
+    sampler.refresh("section")
+    assert wait_for(lambda: sampler.get("section", timeout=0)["value"] == 2)
+
+
+def test_refresh_wakes_dormant_section(app_module):
+    runs = itertools.count(1)
+    sampler = app_module.SectionSampler(
+        {"section": lambda force=False: next(runs)}, {"section": 3600}, lazy={"section"}
+    )
+    sampler.start()
+    assert wait_for(lambda: "section" in sampler._dormant)
+
+    sampler.refresh("section")
+    assert wait_for(lambda: sampler.get("section", timeout=0)["value"] == 1)
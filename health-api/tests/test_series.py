@@ -0,0 +1,19 @@
+import pytest
+
+HEADERS = {"X-API-Key": "test-key"}
+
+
+@pytest.mark.parametrize("bounds", ["from=nan", "to=nan", "from=inf", "from=-inf", "to=inf"])
+def test_non_finite_bounds_rejected(client, bounds):
+    response = client.get(f"/api/health/series?metric=cpu_percent&{bounds}", headers=HEADERS)
+    assert response.status_code == 400
+
+
+def test_huge_range_clamped_to_retention(app_module, client):
+    response = client.get("/api/health/series?metric=cpu_percent&from=-1e300", headers=HEADERS)
+    if response.status_code == 503:
+        pytest.skip("series store not available in this environment")
+    body = response.get_json()
+    retention = app_module.SERIES_RETENTION_HOURS * 3600
+    assert body["to"] - body["from"] == pytest.approx(retention, abs=5)
+    assert body["step"] <= retention // app_module.SERIES_MAX_POINTS + app_module.SERIES_RESOLUTION
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+
+@pytest.fixture
+def job(app_module, monkeypatch):
+    # Keep the step timeline in memory instead of the jobs database
+    monkeypatch.setattr(app_module.VpnSwitchJob, "_save", lambda self: None)
+    return app_module.VpnSwitchJob("test")
+
+
+def sleeper(seconds):
+    return lambda step: time.sleep(seconds)
+
+
+class StepFailed(Exception):
+    pass
+
+
+def failing(step):
+    raise StepFailed("boom")
+
+
+def test_critical_path_follows_longest_chain(app_module, job):
+    graph = app_module.StepGraph(job)
+    graph.add("a", sleeper(0.01))
+    graph.add("b", sleeper(0.2), after=("a",))
+    graph.add("c", sleeper(0.01), after=("a",))
+    graph.add("d", sleeper(0.01), after=("b", "c"))
+
+    assert graph.run() is None
+    assert graph.critical_path()["steps"] == ["a", "b", "d"]
+
+
+def test_critical_path_ignores_failed_and_skipped_steps(app_module, job):
+    graph = app_module.StepGraph(job)
+    graph.add("a", sleeper(0.01))
+    graph.add("b", failing, after=("a",))
+    graph.add("c", sleeper(0.05), after=("a",))
+    graph.add("e", sleeper(0.01), after=("b",))
+
+    assert isinstance(graph.run(), StepFailed)
+    timeline = job.timeline()
+    assert timeline["b"]["status"] == "failed"
+    assert timeline["e"]["status"] == "skipped"
+
+    path = graph.critical_path()
+    assert path["steps"] == ["a", "c"]
+    assert path["duration_ms"] == pytest.approx(timeline["a"]["duration_ms"] + timeline["c"]["duration_ms"])
+
+
+def test_critical_path_empty_when_first_step_fails(app_module, job):
+    graph = app_module.StepGraph(job)
+    graph.add("check", failing)
+    graph.add("next", sleeper(0.01), after=("check",))
+
+    graph.run()
+    assert graph.critical_path() == {"duration_ms": 0, "steps": []}
@@ -0,0 +1,43 @@
+import itertools
+
+from test_sampler import wait_for
+
+
+def test_failing_listener_does_not_stop_sampler(app_module):
+    runs = itertools.count(1)
+    sampler = app_module.SectionSampler({"section": lambda force=False: next(runs)}, {"section": 3600})
+
+    def broken_listener(section, sample):
+        raise RuntimeError("listener bug")
+
+    sampler.add_listener(broken_listener)
+    sampler.start()
+    assert sampler.get("section")["value"] == 1
+
+    sampler.refresh("section")
+    assert wait_for(lambda: sampler.get("section", timeout=0)["value"] == 2)
+
+
+def storage_sample(timestamp, status="healthy"):
+    return {
+        "value": {
+            "timestamp": timestamp,
+            "status": status,
+            "arrays": [],
+            "drives": [{"device": "/dev/sda", "smart_status": "PASSED", "sampled_at": timestamp}],
+        },
+        "sampled_at": timestamp,
+    }
+
+
+def test_storage_event_only_when_changed(app_module, monkeypatch):
+    broker = app_module.HealthEventBroker()
+    published = []
+    monkeypatch.setattr(broker, "publish", lambda event, data: published.append(data))
+
+    broker.on_sample("storage", storage_sample("2026-01-01T00:00:00+00:00"))
+    broker.on_sample("storage", storage_sample("2026-01-01T00:05:00+00:00"))
+    assert len(published) == 1
+
+    broker.on_sample("storage", storage_sample("2026-01-01T00:10:00+00:00", status="degraded"))
+    assert len(published) == 2
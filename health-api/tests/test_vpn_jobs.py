@@ -0,0 +1,14 @@
+def test_job_streams_are_capped(app_module, client, monkeypatch):
+    job, _ = app_module.vpn_jobs.submit("toronto", "test")
+    monkeypatch.setattr(app_module, "_job_stream_slots", app_module.threading.BoundedSemaphore(1))
+    url = f"/api/health/vpn/jobs/{job['id']}/stream"
+    headers = {"X-API-Key": "test-key"}
+
+    first = client.get(url, headers=headers, buffered=False)
+    assert first.status_code == 200
+    assert client.get(url, headers=headers).status_code == 503
+
+    first.close()
+    second = client.get(url, headers=headers, buffered=False)
+    assert second.status_code == 200
+    second.close()
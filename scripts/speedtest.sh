@@ -44,6 +44,38 @@ parse_speedtest() {
     echo "{\"download\": $download_mbps, \"upload\": $upload_mbps, \"ping\": $ping_ms, \"jitter\": $jitter_ms, \"server\": \"$server_name\", \"location\": \"$server_location\"}"
 }
 
+# Switch VPN via health-api. The switch runs as a background job, so submit it
+# and poll the job until it finishes. Prints the job's result JSON
+# ({"success": true, ...} or {"error": ...}).
+vpn_switch() {
+    local location="$1" reason="$2"
+    local job job_id status
+
+    job=$(curl -s -X POST "http://localhost:5000/api/health/vpn/switch" \
+        -H "Content-Type: application/json" \
+        -H "X-API-Key: ${HEALTH_API_KEY:-}" \
+        -d "{\"location\": \"$location\", \"reason\": \"$reason\"}" \
+        --max-time 30 2>&1) || true
+    job_id=$(echo "$job" | jq -r '.job_id // empty' 2>/dev/null) || true
+    if [[ -z "$job_id" ]]; then
+        echo "$job"
+        return
+    fi
+
+    for _ in $(seq 1 60); do
+        sleep 3
+        job=$(curl -s "http://localhost:5000/api/health/vpn/jobs/$job_id" \
+            -H "X-API-Key: ${HEALTH_API_KEY:-}" \
+            --max-time 10 2>&1) || continue
+        status=$(echo "$job" | jq -r '.status // empty' 2>/dev/null) || continue
+        if [[ "$status" == "succeeded" || "$status" == "failed" ]]; then
+            echo "$job" | jq -c '.result'
+            return
+        fi
+    done
+    echo "{\"error\": \"VPN switch job $job_id did not finish within 180s\"}"
+}
+
 # Run home speedtest (local CLI)
 log "Starting speed tests..."
 log "Running home speedtest..."
@@ -122,11 +154,7 @@ if [[ -n "$ACTIVE_VPN" && -f "$NGINX_CONF" ]]; then
     if [[ -n "$EXPECTED_PORT" && "$NGINX_PORT" != "$EXPECTED_PORT" ]]; then
         log "⚠ PORT MISMATCH: nginx=$NGINX_PORT, expected=$EXPECTED_PORT for $ACTIVE_VPN"
         log "🔧 AUTO-SYNC: Calling health-api to re-sync VPN configuration..."
-        sync_result=$(curl -s -X POST "http://localhost:5000/api/health/vpn/switch" \
-            -H "Content-Type: application/json" \
-            -H "X-API-Key: ${HEALTH_API_KEY:-}" \
-            -d "{\"location\": \"$ACTIVE_VPN\", \"reason\": \"auto-sync-port-mismatch\"}" \
-            --max-time 120 2>&1)
+        sync_result=$(vpn_switch "$ACTIVE_VPN" "auto-sync-port-mismatch")
 
         if echo "$sync_result" | jq -e '.success' >/dev/null 2>&1; then
             log "✓ AUTO-SYNC: VPN configuration re-synced to $ACTIVE_VPN"
@@ -220,11 +248,7 @@ if [[ "$TRANSMISSION_ORPHANED" == "true" ]]; then
         log "🔧 Best healthy VPN: $best_vpn (${best_speed}Mbps) - calling health-api to switch..."
 
         # Call health-api switch endpoint (handles transmission, nginx, sonarr, radarr)
-        switch_result=$(curl -s -X POST "http://localhost:5000/api/health/vpn/switch" \
-            -H "Content-Type: application/json" \
-            -H "X-API-Key: ${HEALTH_API_KEY:-}" \
-            -d "{\"location\": \"$best_vpn\", \"reason\": \"auto-repair-orphaned-transmission\"}" \
-            --max-time 120 2>&1)
+        switch_result=$(vpn_switch "$best_vpn" "auto-repair-orphaned-transmission")
 
         if echo "$switch_result" | jq -e '.success' >/dev/null 2>&1; then
             log "✓ AUTO-REPAIR: VPN switched to $best_vpn via health-api"
@@ -128,6 +128,13 @@ def get_cached_dns_state() -> dict[str, Any]:
     return result
 
 
+def record_home_ip(ip: str) -> None:
+    """Cache a home IP fetched elsewhere (e.g. from the health-api bundle)."""
+    global _home_ip_cache, _home_ip_last_check
+    _home_ip_cache = ip
+    _home_ip_last_check = datetime.now(timezone.utc)
+
+
 def _get_home_ip(use_cache: bool = True) -> dict[str, Any]:
     """Fetch current public IP from home server via health-api."""
     global _home_ip_cache, _home_ip_last_check
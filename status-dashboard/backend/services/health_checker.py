@@ -9,6 +9,7 @@ from typing import Any
 import requests
 
 from backend.config import SERVICES, HEALTH_API_URL, HEALTH_API_KEY, PLEX_URL, PLEX_TOKEN
+from backend.services import dns_manager
 
 logger = logging.getLogger(__name__)
 
@@ -83,25 +84,59 @@ def fetch_internal_services() -> dict[str, Any]:
             timeout=30,
         )
         resp.raise_for_status()
-        data = resp.json()
-        # Convert to dict keyed by service name for easy lookup
-        return {
-            svc["name"]: {
-                "container_name": svc["container"].get("name"),
-                "container_running": svc["container"]["running"],
-                "container_health": svc["container"].get("health"),
-                "container_uptime": svc["container"].get("uptime_seconds"),
-                "port_responding": svc["local_port"]["responding"],
-                "port_status_code": svc["local_port"].get("status_code"),
-            }
-            for svc in data.get("services", [])
-        }
+        return _internal_services_by_name(resp.json())
     except requests.exceptions.RequestException:
         return {}
     except Exception:
         return {}
 
 
+def _internal_services_by_name(data: dict[str, Any]) -> dict[str, Any]:
+    """Convert a /api/health/services document to a dict keyed by service name."""
+    return {
+        svc["name"]: {
+            "container_name": svc["container"].get("name"),
+            "container_running": svc["container"]["running"],
+            "container_health": svc["container"].get("health"),
+            "container_uptime": svc["container"].get("uptime_seconds"),
+            "port_responding": svc["local_port"]["responding"],
+            "port_status_code": svc["local_port"].get("status_code"),
+        }
+        for svc in data.get("services", [])
+    }
+
+
+def fetch_health_bundle() -> dict[str, Any] | None:
+    """Fetch health, internal services and public IP in one request.
+
+    Returns {"health": <check_health_api() shape>, "internal": <fetch_internal_services()
+    shape>}, and hands the public IP to dns_manager. A part the bundle could not produce
+    is None. Returns None if the bundle request itself fails (including a 404 from a
+    health-api without /api/health/bundle); either way the caller falls back to the
+    separate endpoint for whatever is missing.
+    """
+    headers = {"X-API-Key": HEALTH_API_KEY} if HEALTH_API_KEY else {}
+    try:
+        resp = requests.get(f"{HEALTH_API_URL}/bundle", headers=headers, timeout=30)
+        resp.raise_for_status()
+        parts = resp.json()["parts"]
+    except Exception as e:
+        logger.warning(f"Health bundle unavailable, using separate endpoints: {type(e).__name__}: {str(e)[:100]}")
+        return None
+
+    health_part = parts.get("health", {})
+    health = {"reachable": True, "data": health_part["data"]} if health_part.get("status") == "ok" else None
+
+    services_part = parts.get("services", {})
+    internal = _internal_services_by_name(services_part["data"]) if services_part.get("status") == "ok" else None
+
+    ip_part = parts.get("public_ip", {})
+    if ip_part.get("status") == "ok" and ip_part["data"].get("ip"):
+        dns_manager.record_home_ip(ip_part["data"]["ip"])
+
+    return {"health": health, "internal": internal}
+
+
 def check_plex_library() -> dict[str, Any]:
     """Check Plex library directly."""
     if not PLEX_TOKEN:
@@ -164,8 +199,12 @@ def run_health_check() -> dict[str, Any]:
         "overall_status": "healthy",
     }
 
-    # Fetch internal service status (container + local port)
-    internal_status = fetch_internal_services()
+    # Fetch health metrics, internal service status (container + local port) and
+    # public IP in one round trip; older health-api versions need one request each
+    bundle = fetch_health_bundle() or {}
+    internal_status = bundle.get("internal")
+    if internal_status is None:
+        internal_status = fetch_internal_services()
 
     # Check all services externally in parallel (prevents timeout cascade)
     down_count = 0
@@ -207,7 +246,7 @@ def run_health_check() -> dict[str, Any]:
             down_count += 1
 
     # Check health API for metrics
-    health = check_health_api()
+    health = bundle.get("health") or check_health_api()
     if health.get("reachable"):
         results["home_server_reachable"] = True
         data = health.get("data", {})
@@ -161,23 +161,34 @@ export function App() {
     setVpnMessage(null)
 
     try {
-      // VPN switch takes ~2 minutes, set 3 minute timeout
-      const controller = new AbortController()
-      const timeoutId = setTimeout(() => controller.abort(), 180000)
-
-      const res = await fetch(`${HEALTH_API}/api/admin/vpn/switch`, {
+      // The switch runs as a background job on health-api - submit it, then poll the job
+      const res = await fetchWithTimeout(`${HEALTH_API}/api/admin/vpn/switch`, {
         method: 'POST',
         credentials: 'include',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ location }),
-        signal: controller.signal
-      })
+        body: JSON.stringify({ location })
+      }, 15000)
 
-      clearTimeout(timeoutId)
-
-      const data = await res.json()
+      let data = await res.json()
 
       if (res.ok) {
+        // VPN switch takes ~2 minutes, give up after 3
+        for (let i = 0; i < 90 && !['succeeded', 'failed'].includes(data.status); i++) {
+          await new Promise(r => setTimeout(r, 2000))
+          const jobRes = await fetchWithTimeout(`${HEALTH_API}/api/admin/vpn/jobs/${data.job_id}`, {
+            credentials: 'include'
+          }, 5000).catch(() => null)
+          if (jobRes?.ok) {
+            data = await jobRes.json()
+          }
+        }
+        if (data.status !== 'succeeded') {
+          const error = data.status === 'failed' ? data.result?.error : 'Switch is taking longer than expected'
+          setVpnMessage({ type: 'error', text: error || 'Switch failed' })
+          setVpnSwitching(null)
+          return
+        }
+
         // Keep spinner going - poll until speed test shows new location as active
         const pollForActive = async (maxAttempts = 20) => {
           for (let i = 0; i < maxAttempts; i++) {
@@ -215,19 +226,13 @@ export function App() {
   // Restart a container
   const restartContainer = async (containerName) => {
     try {
-      // Container restarts can take 10+ seconds, set a long timeout
-      const controller = new AbortController()
-      const timeoutId = setTimeout(() => controller.abort(), 60000) // 60 second timeout
-
-      const res = await fetch(`${HEALTH_API}/api/admin/container/restart`, {
+      // The restart is queued on health-api - submit it, then poll the operation record
+      const res = await fetchWithTimeout(`${HEALTH_API}/api/admin/container/restart`, {
         method: 'POST',
         credentials: 'include',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ container: containerName }),
-        signal: controller.signal
-      })
-
-      clearTimeout(timeoutId)
+        body: JSON.stringify({ container: containerName })
+      }, 15000)
 
       const data = await res.json()
 
@@ -235,8 +240,23 @@ export function App() {
         return { success: false, error: data.error || 'Restart failed' }
       }
 
-      // Refresh status after restart
-      setTimeout(fetchStatus, 2000)
+      // Restarts usually take ~10 seconds, give up after 2 minutes
+      let op = { status: data.op_status }
+      for (let i = 0; i < 60 && !['succeeded', 'failed'].includes(op.status); i++) {
+        await new Promise(r => setTimeout(r, 2000))
+        const opRes = await fetchWithTimeout(`${HEALTH_API}/api/admin/container/ops/${data.op_id}`, {
+          credentials: 'include'
+        }, 5000).catch(() => null)
+        if (opRes?.ok) {
+          op = await opRes.json()
+        }
+      }
+
+      // Refresh status to pick up the new uptime
+      fetchStatus()
+      if (op.status !== 'succeeded') {
+        return { success: false, error: op.error || 'Restart is taking longer than expected' }
+      }
       return { success: true }
     } catch (e) {
       console.error('Restart failed:', e.name, e.message, e)
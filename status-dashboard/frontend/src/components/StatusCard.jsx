@@ -27,19 +27,6 @@ export function StatusCard({ service, adminAuth, onRestart, highlight }) {
     }
   }, [confirming])
 
-  // Stop spinner when uptime drops low (container restarted and status refreshed)
-  const [uptimeBeforeRestart, setUptimeBeforeRestart] = useState(null)
-
-  useEffect(() => {
-    if (restarting && uptimeBeforeRestart && internal?.container_uptime) {
-      // Stop if uptime is now lower than before (container restarted)
-      if (internal.container_uptime < uptimeBeforeRestart) {
-        setRestarting(false)
-        setUptimeBeforeRestart(null)
-      }
-    }
-  }, [internal?.container_uptime, restarting, uptimeBeforeRestart])
-
   // Determine overall status and issue type
   let statusType = 'down'
   let issueType = null
@@ -99,16 +86,14 @@ export function StatusCard({ service, adminAuth, onRestart, highlight }) {
     setConfirming(false)
     setRestarting(true)
     setError(null)
-    setUptimeBeforeRestart(internal?.container_uptime || 9999)
 
     const result = await onRestart(containerName)
 
+    // The restart has finished (or failed) by the time onRestart resolves
     if (!result.success) {
       setError(result.error)
-      setRestarting(false)
-      setUptimeBeforeRestart(null)
     }
-    // Spinner stops when useEffect detects uptime change from status refresh
+    setRestarting(false)
   }
 
   // Can restart if admin, has container name, and container isn't health-api